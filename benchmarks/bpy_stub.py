@@ -0,0 +1,57 @@
+import timeit
+
+from blender_script_creator import StubProxy
+
+N = 100000
+
+
+# the placeholder used before StubProxy, kept here for comparison
+class LegacyAnygetter():
+    def __init__(self,name,original=None):
+        self.name = name
+        self._original = original
+
+    def __getattribute__(self, item):
+        if item == "_original":
+            return super().__getattribute__(item)
+        if self._original:
+            try:
+                d = self._original.__getattribute__(item)
+                return LegacyAnygetter(item,d)
+            except:
+                pass
+        return LegacyAnygetter("__unknown__")
+
+    def __call__(self, *args, **kwargs):
+        if self._original:
+            try:
+                d = self._original(*args, **kwargs)
+                return LegacyAnygetter("{}({},{})".format(self.name,args,kwargs),d)
+            except:
+                pass
+        return LegacyAnygetter("{}({},{})".format(self.name,args,kwargs))
+
+    def __iter__(self):
+        return iter([])
+
+    def __getitem__(self, item):
+        if self._original:
+            try:
+                d = self._original.__getitem__(item)
+                return LegacyAnygetter(item,d)
+            except:
+                pass
+        return LegacyAnygetter(item)
+
+
+CASES = {
+    "attribute chain": "bpy.context.scene.objects",
+    "call": "bpy.data.objects.new('ball', None)",
+    "item lookup": "bpy.data.materials['ball_mat'].node_tree",
+}
+
+for label, stmt in CASES.items():
+    legacy = min(timeit.repeat(stmt, globals={"bpy": LegacyAnygetter("bpy")}, number=N, repeat=5))
+    stub = min(timeit.repeat(stmt, globals={"bpy": StubProxy("bpy")}, number=N, repeat=5))
+    print("{:<16} legacy {:7.3f} us  stub {:7.3f} us  x{:.1f}".format(
+        label, legacy / N * 1e6, stub / N * 1e6, legacy / stub))
@@ -0,0 +1,39 @@
+import time
+
+import numpy as np
+
+from blender_script_creator.simulation import BallSimulation
+
+SIZES = [1000, 2000, 4000, 8000, 16000, 32000]
+DENSITY = 0.05  # balls per unit volume, kept constant so the work per ball should stay flat
+RADIUS = 0.5
+STEPS = 48
+SEED = 100
+
+
+def simulation(n, seed=SEED):
+    rng = np.random.default_rng(seed)
+    size = (n / DENSITY) ** (1 / 3)
+    positions = rng.uniform(RADIUS, size - RADIUS, (n, 3))
+    velocities = rng.normal(size=(n, 3)) * 3
+    return BallSimulation(positions, velocities, radii=RADIUS, box_min=0, box_max=size)
+
+
+def naive_pairs(sim):
+    d = sim.positions[:, None, :] - sim.positions[None, :, :]
+    touching = np.einsum("ijk,ijk->ij", d, d) < (sim.radii[:, None] + sim.radii[None, :]) ** 2
+    return set(zip(*np.nonzero(np.triu(touching, 1))))
+
+
+sim = simulation(SIZES[0])
+i, j = sim.candidate_pairs()
+assert naive_pairs(sim) <= set(zip(np.minimum(i, j), np.maximum(i, j)))
+
+for n in SIZES:
+    sim = simulation(n)
+    t = time.perf_counter()
+    for _ in range(STEPS):
+        sim.step()
+    dt = time.perf_counter() - t
+    print("{:>6} balls: {:8.1f} ms  {:6.2f} us/ball-step  {:6.1f} pair checks/ball  {:6} collisions".format(
+        n, dt * 1000, dt / (n * STEPS) * 1e6, sim.pair_checks / (n * STEPS), int((sim.events["other"] >= 0).sum())))
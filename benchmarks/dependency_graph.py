@@ -0,0 +1,47 @@
+import random
+import time
+
+from blender_script_creator.script import BlenderClass, BlenderFunction, DependencyGraph
+
+SIZES = [1250, 2500, 5000, 10000]
+MAX_DEPENDENCIES = 3
+SEED = 100
+
+
+def dummy():
+    pass
+
+
+def synthetic_library(n, seed=SEED):
+    # half functions, half classes; every node depends on up to MAX_DEPENDENCIES earlier nodes and
+    # classes derive from BlenderClass or from a shallow earlier class
+    rng = random.Random(seed)
+    nodes = []
+    roots = []
+    for i in range(n):
+        dependencies = rng.sample(nodes, min(len(nodes), rng.randint(0, MAX_DEPENDENCIES)))
+        if i % 2:
+            bases = roots[-8:] or [BlenderClass]
+            cls = type("C{}".format(i), (rng.choice(bases),), {"dependencies": dependencies})
+            if cls.__base__ is BlenderClass:
+                roots.append(cls)
+            nodes.append(cls)
+        else:
+            nodes.append(BlenderFunction(dummy, dependencies=dependencies))
+    return nodes
+
+
+def resolve(nodes):
+    graph = DependencyGraph()
+    for node in reversed(nodes):
+        graph.add(node)
+    return graph
+
+
+for n in SIZES:
+    nodes = synthetic_library(n)
+    t = time.perf_counter()
+    graph = resolve(nodes)
+    dt = time.perf_counter() - t
+    assert len(graph) == n + 1
+    print("{:>6} nodes: {:8.1f} ms  {:6.2f} us/node".format(n, dt * 1000, dt / n * 1e6))
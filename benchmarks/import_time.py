@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+# cumulative import time budget per module in microseconds, best of REPEAT runs of python -X importtime
+BUDGET_US = {
+    "blender_script_creator": 15000,
+    "blender_script_creator.script": 40000,
+    "blender_script_creator.geometry": 50000,
+    "blender_script_creator.animation": 55000,
+}
+# modules that must stay out of the import chain
+FORBIDDEN = ["numpy"]
+REPEAT = 5
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    out = subprocess.run([sys.executable, "-X", "importtime", "-W", "ignore", "-c", "import " + module],
+                         capture_output=True, text=True, env=env, check=True).stderr
+    times = {}
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if cumulative_us.strip().isdigit():
+            times[name.strip()] = int(cumulative_us)
+    return times
+
+
+failed = False
+for module, budget in BUDGET_US.items():
+    runs = [import_times(module) for i in range(REPEAT)]
+    best = min(r[module] for r in runs)
+    forbidden = [m for m in FORBIDDEN if m in runs[0]]
+    ok = best <= budget and not forbidden
+    failed |= not ok
+    print("{:<36} {:>8} us  budget {:>8} us  {}{}".format(
+        module, best, budget, "ok" if ok else "OVER",
+        "  imports " + ", ".join(forbidden) if forbidden else ""))
+
+sys.exit(1 if failed else 0)
@@ -0,0 +1,48 @@
+from blender_script_creator import bpy
+from blender_script_creator.animation import BlenderAnimationTracker
+from blender_script_creator.geometry import Sphere
+from blender_script_creator.script import BlenderScript, blender_function
+
+script = BlenderScript()
+
+
+# run the generated _blend.py inside blender: keys one location channel per frame with LINEAR interpolation,
+# once with the former scan over every keyframe point and once through the tracker's frame index
+@blender_function(dependencies=[Sphere, BlenderAnimationTracker])
+def keyframe_interpolation_main():
+    import time
+    FRAME_COUNTS = [500, 1000, 2000, 5000, 10000]
+
+    def legacy(anim, obj, frames):
+        for f in range(frames):
+            anim.go_to_frame(f)
+            obj.location = (f, 0, 0)
+            obj.keyframe_insert(data_path="location", frame=anim.current_frame)
+            for fc in [fc for fc in obj.animation_data.action.fcurves if fc.data_path == "location"]:
+                for kfp in fc.keyframe_points:
+                    if kfp.co.x == anim.current_frame:
+                        kfp.interpolation = "LINEAR"
+
+    def indexed(anim, obj, frames):
+        for f in range(frames):
+            anim.go_to_frame(f)
+            obj.location = (f, 0, 0)
+            anim.insert_keyframe(obj, "location", interpolation="LINEAR")
+
+    for frames in FRAME_COUNTS:
+        for name, run in (("legacy", legacy), ("indexed", indexed)):
+            anim = BlenderAnimationTracker()
+            anim.clear_all()
+            obj = Sphere.new("bench_{}_{}".format(name, frames)).obj
+            t = time.perf_counter()
+            run(anim, obj, frames)
+            dt = time.perf_counter() - t
+            print("{:>6} frames {:>8}: {:9.1f} ms  {:7.2f} us/key".format(frames, name, dt * 1000,
+                                                                          dt / frames * 1e6))
+            bpy.data.objects.remove(obj)
+
+
+script.main = keyframe_interpolation_main
+
+with open(__file__.replace(".py", "_blend.py"), "w+") as f:
+    f.write(script.to_script())
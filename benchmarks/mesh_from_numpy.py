@@ -0,0 +1,54 @@
+from blender_script_creator import bpy
+from blender_script_creator.geometry import Mesh
+from blender_script_creator.script import BlenderScript, blender_function
+
+script = BlenderScript()
+
+
+# run the generated _blend.py inside blender: builds a grid of quads once with per element bmesh calls and once
+# with Mesh.from_numpy, then reads it back with to_numpy
+@blender_function(dependencies=[Mesh])
+def mesh_from_numpy_main():
+    import time
+    import bmesh
+    SIDES = [100, 300, 1000]
+
+    def grid(side):
+        x, y = np.meshgrid(np.arange(side), np.arange(side), indexing="ij")
+        vertices = np.stack([x.ravel(), y.ravel(), np.zeros(side * side)], axis=1)
+        i = np.arange(side * side).reshape(side, side)[:-1, :-1].ravel()
+        faces = np.stack([i, i + side, i + side + 1, i + 1], axis=1)
+        return vertices, faces
+
+    def per_element(vertices, faces):
+        mesh = bpy.data.meshes.new("bench_bmesh")
+        bm = bmesh.new()
+        verts = [bm.verts.new(v) for v in vertices.tolist()]
+        for f in faces.tolist():
+            bm.faces.new([verts[i] for i in f])
+        bm.to_mesh(mesh)
+        bm.free()
+        return mesh
+
+    for side in SIDES:
+        vertices, faces = grid(side)
+        t = time.perf_counter()
+        mesh = per_element(vertices, faces)
+        dt_bmesh = time.perf_counter() - t
+        bpy.data.meshes.remove(mesh)
+
+        t = time.perf_counter()
+        mesh = Mesh.from_numpy(vertices, faces, name="bench_numpy")
+        dt_numpy = time.perf_counter() - t
+        t = time.perf_counter()
+        mesh.to_numpy()
+        dt_read = time.perf_counter() - t
+        bpy.data.meshes.remove(mesh.mesh)
+        print("{:>8} verts: bmesh {:9.1f} ms  from_numpy {:8.1f} ms  to_numpy {:8.1f} ms".format(
+            len(vertices), dt_bmesh * 1000, dt_numpy * 1000, dt_read * 1000))
+
+
+script.main = mesh_from_numpy_main
+
+with open(__file__.replace(".py", "_blend.py"), "w+") as f:
+    f.write(script.to_script())
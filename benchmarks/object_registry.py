@@ -0,0 +1,54 @@
+import sys
+
+from blender_script_creator.geometry import BlenderObject, ObjectIndex, get_or_create_object
+from blender_script_creator.scene import delete_all_but
+from blender_script_creator.script import BlenderScript, BlenderVariable, blender_function
+
+OBJECT_COUNTS = [1000, 5000, 10000, 20000, 50000]
+
+script = BlenderScript()
+script.register_blender_variable(BlenderVariable("OBJECT_COUNTS", OBJECT_COUNTS))
+
+
+# run the generated _blend.py inside blender: creates N empties through get_or_create_object, which looks each
+# name up before creating it, then looks every object up again by name and by base name
+@blender_function(dependencies=[BlenderObject, ObjectIndex, get_or_create_object, delete_all_but])
+def object_registry_main():
+    import time
+
+    for n in OBJECT_COUNTS:
+        delete_all_but([])
+        BlenderObject.objects.clear()
+        BlenderObject.used_names.clear()
+
+        t = time.perf_counter()
+        for i in range(n):
+            get_or_create_object("empty{}".format(i))
+        create = time.perf_counter() - t
+
+        BlenderObject.objects.clear()
+        BlenderObject.used_names.clear()
+        t = time.perf_counter()
+        for i in range(n):
+            ObjectIndex.find("empty{}".format(i))
+            ObjectIndex.find("empty{}".format(i), deep_search=True)
+        lookup = time.perf_counter() - t
+        print("{:>6} objects: create {:8.1f} ms ({:6.1f} us/object)  lookup {:6.2f} us/object".format(
+            n, create * 1000, create / n * 1e6, lookup / n * 1e6))
+    delete_all_but([])
+
+
+script.main = object_registry_main
+
+with open(__file__.replace(".py", "_blend.py"), "w+") as f:
+    f.write(script.to_script())
+
+# without blender, `python object_registry.py --record` runs the generated script against the rna recorder: the
+# timings then cover the library's own work, and the recorded rna operations per object have to stay flat
+if "--record" in sys.argv:
+    from blender_script_creator.recording import run_file
+    trace = run_file(__file__.replace(".py", "_blend.py"))
+    totals = trace.totals()
+    per_object = {kind: count / sum(OBJECT_COUNTS) for kind, count in totals.items()}
+    print("rna operations per object: " + ", ".join("{} {:.1f}".format(k, v) for k, v in sorted(per_object.items())))
+    assert per_object["read"] < 50 and per_object["call"] < 5, "object creation or lookup scales with the scene"
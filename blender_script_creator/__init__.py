@@ -1,50 +1,137 @@
+import importlib
+from types import ModuleType
 from warnings import warn
 
-class Anygetter():
-    def __init__(self,name,original=None):
-        self.name = name
-        self._original = original
+_submodules = ("animation", "composing", "geometry", "materials", "modifier", "nodes", "pointcache", "precompute",
+               "recording", "scene", "script", "simulation", "source", "trajectories")
+
+
+def __getattr__(name):
+    # PEP 562: submodules are imported on first access instead of with the package
+    if name in _submodules:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_submodules))
+
+
+class LazyModule():
+    # module placeholder that imports on first attribute access, used for numpy which library code only
+    # needs inside methods
+    __slots__ = ("__dict__", "_module_name")
+
+    def __init__(self, module_name):
+        object.__setattr__(self, "_module_name", module_name)
+
+    def __getattr__(self, item):
+        value = getattr(importlib.import_module(self._module_name), item)
+        self.__dict__[item] = value
+        return value
+
+    def __repr__(self):
+        return "<{} {}>".format(self.__class__.__name__, self._module_name)
 
-    def __getattribute__(self, item):
-        if item == "_original":
-            return super().__getattribute__(item)
-        if self._original:
-            try:
-                d = self._original.__getattribute__(item)
-                return Anygetter(item,d)
-            except:
-                pass
-        return Anygetter("__unknown__")
+
+class StubProxy():
+    # stands in for bpy/bmesh outside of blender. child proxies are created once per attribute name and kept in
+    # the instance __dict__, so repeated lookups never reach __getattr__; names are only assembled for printing
+    __slots__ = ("__dict__", "_name", "_parent", "_original", "_items", "_call")
+
+    def __init__(self, name, original=None, parent=None):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_parent", parent)
+        object.__setattr__(self, "_original", original)
+        object.__setattr__(self, "_items", None)
+        object.__setattr__(self, "_call", None)
+
+    def __getattr__(self, item):
+        if item.startswith("__"):
+            raise AttributeError(item)
+        original = self._original
+        if original is None:
+            child = self.__dict__[item] = StubProxy(item, parent=self)
+            return child
+        try:
+            value = getattr(original, item)
+        except AttributeError:
+            child = self.__dict__[item] = StubProxy(item, parent=self)
+            return child
+        child = StubProxy(item, value, self)
+        # only static namespaces are cached, attributes of live blender data may change between reads
+        if isinstance(value, (ModuleType, type)):
+            self.__dict__[item] = child
+        return child
+
+    def __setattr__(self, key, value):
+        if self._original is not None:
+            setattr(self._original, key, value)
 
     def __call__(self, *args, **kwargs):
-        if self._original:
-            try:
-                d = self._original(*args, **kwargs)
-                return Anygetter("{}({},{})".format(self.name,args,kwargs),d)
-            except:
-                pass
-        return Anygetter("{}({},{})".format(self.name,args,kwargs))
+        original = self._original
+        if original is not None:
+            return StubProxy("()", original(*args, **kwargs), self)
+        call = self._call
+        if call is None:
+            call = StubProxy("()", parent=self)
+            object.__setattr__(self, "_call", call)
+        return call
 
     def __iter__(self):
         return iter([])
 
     def __getitem__(self, item):
-        if self._original:
+        key = ("[]", item)
+        original = self._original
+        if original is not None:
             try:
-                d = self._original.__getitem__(item)
-                return Anygetter(item,d)
-            except:
+                return StubProxy(key, original[item], self)
+            except LookupError:
                 pass
-        return Anygetter(item)
+        children = self._items
+        if children is None:
+            children = {}
+            object.__setattr__(self, "_items", children)
+        try:
+            child = children.get(key)
+            if child is None:
+                child = children[key] = StubProxy(key, parent=self)
+            return child
+        except TypeError:
+            return StubProxy(key, parent=self)
+
+    def _path(self):
+        parts = []
+        proxy = self
+        while proxy is not None:
+            parts.append(proxy._name)
+            proxy = proxy._parent
+        s = parts.pop()
+        for part in reversed(parts):
+            if isinstance(part, tuple):
+                s += "[{!r}]".format(part[1])
+            elif part == "()":
+                s += part
+            else:
+                s += "." + part
+        return s
+
+    def __repr__(self):
+        return "<{} {}>".format(self.__class__.__name__, self._path())
+
+
+Anygetter = StubProxy
+
 try:
     import bmesh as blendermesh
     import bpy as blenderpy
-    blendermesh = Anygetter("bmesh",blendermesh)
-    blenderpy = Anygetter("bpy",blenderpy)
+    blendermesh = StubProxy("bmesh",blendermesh)
+    blenderpy = StubProxy("bpy",blenderpy)
 except ModuleNotFoundError:
     warn("blender libraries cannot be imported, the script creator should work but autocomplete might not!")
-    blendermesh = Anygetter("bmesh")
-    blenderpy = Anygetter("bpy")
+    blendermesh = StubProxy("bmesh")
+    blenderpy = StubProxy("bpy")
 
 bmesh = blendermesh
-bpy = blenderpy
\ No newline at end of file
+bpy = blenderpy
@@ -1,15 +1,336 @@
-import numpy as np
-from blender_script_creator import bpy
+from blender_script_creator import bpy, LazyModule
 from blender_script_creator.geometry import BlenderObject, create_plain_object
 from blender_script_creator.materials import Material
 from blender_script_creator.script import BlenderClass, blender_function
 
+np = LazyModule("numpy")
+
+
+@blender_function(dependencies=[])
+def write_fcurve_points(fc, frames, values, interpolation):
+    # merges the given keys into fc with one foreach_set per property, keys on existing frames are replaced but
+    # keep their handles, only new keys get AUTO_CLAMPED handles. frames are stored as float32 by blender, so the
+    # new ones are rounded the same way before they are matched against existing keys
+    frames = np.asarray(frames, dtype=np.float32).astype(float)
+    values = np.asarray(values, dtype=float)
+    interpolation = np.asarray(interpolation, dtype=np.int32)
+    co = np.stack([frames, values], axis=1)
+    handle_left, handle_right = co, co
+    handle_type = np.full((2, len(frames)), 4, dtype=np.int32)  # AUTO_CLAMPED
+    points = fc.keyframe_points
+    n = len(points)
+    if n:
+        old = {}
+        for name, width, dtype in (("co", 2, float), ("handle_left", 2, float), ("handle_right", 2, float),
+                                   ("interpolation", 1, np.int32), ("handle_left_type", 1, np.int32),
+                                   ("handle_right_type", 1, np.int32)):
+            data = np.empty(width * n, dtype=dtype)
+            points.foreach_get(name, data)
+            old[name] = data.reshape(n, width) if width > 1 else data
+        co = np.concatenate([old["co"], co])
+        handle_left = np.concatenate([old["handle_left"], handle_left])
+        handle_right = np.concatenate([old["handle_right"], handle_right])
+        interpolation = np.concatenate([old["interpolation"], interpolation])
+        handle_type = np.concatenate([np.stack([old["handle_left_type"], old["handle_right_type"]]), handle_type],
+                                     axis=1)
+
+    order = np.argsort(co[:, 0], kind="stable")
+    co, handle_left, handle_right = co[order], handle_left[order], handle_right[order]
+    interpolation, handle_type = interpolation[order], handle_type[:, order]
+    # the last key on a frame sets the value, handles come from the first one, an existing key if there is one
+    change = co[1:, 0] != co[:-1, 0]
+    first = np.r_[True, change]
+    last = np.r_[change, True]
+    shift = co[last] - co[first]
+    co, interpolation = co[last], interpolation[last]
+    handle_left, handle_right = handle_left[first] + shift, handle_right[first] + shift
+    handle_type = handle_type[:, first]
+
+    m = len(co)
+    if m > n:
+        points.add(m - n)
+    for i in range(n - m):
+        points.remove(points[-1])
+
+    points.foreach_set("co", co.ravel())
+    points.foreach_set("handle_left", handle_left.ravel())
+    points.foreach_set("handle_right", handle_right.ravel())
+    points.foreach_set("interpolation", interpolation)
+    points.foreach_set("handle_left_type", handle_type[0])
+    points.foreach_set("handle_right_type", handle_type[1])
+    fc.update()
+
+
+@blender_function(dependencies=[])
+def get_or_create_fcurve(owner, data_path, index=0):
+    if owner.animation_data is None:
+        owner.animation_data_create()
+    if owner.animation_data.action is None:
+        owner.animation_data.action = bpy.data.actions.new(owner.name + "Action")
+    action = owner.animation_data.action
+    fc = action.fcurves.find(data_path, index=index)
+    if fc is None:
+        fc = action.fcurves.new(data_path, index=index)
+    return fc
+
+
+@blender_function(dependencies=[])
+def remove_fcurve_points(fc, ranges):
+    # removes the keys with start < frame <= end for every (start, end) in ranges, None leaves a side open
+    points = fc.keyframe_points
+    n = len(points)
+    if n == 0:
+        return 0
+    co = np.empty(2 * n)
+    points.foreach_get("co", co)
+    frames = co[0::2]
+    remove = np.zeros(n, dtype=bool)
+    for start, end in ranges:
+        lo = 0 if start is None else np.searchsorted(frames, start, side="right")
+        hi = n if end is None else np.searchsorted(frames, end, side="right")
+        remove[lo:hi] = True
+    removed = int(remove.sum())
+    if removed == 0:
+        return 0
+
+    keep = np.flatnonzero(~remove)
+    tail = len(keep) == 0 or keep[-1] == len(keep) - 1
+    if tail and removed <= 16:
+        # a short tail is cut, removing from the end moves no other points
+        for i in range(removed):
+            points.remove(points[-1], fast=True)
+    elif hasattr(points, "clear"):
+        # everything else shrinks the points in one go: clear, add the kept count and write the kept fields back
+        fields = {}
+        for name, width, dtype in (("co", 2, float), ("handle_left", 2, float), ("handle_right", 2, float),
+                                   ("interpolation", 1, np.int32), ("handle_left_type", 1, np.int32),
+                                   ("handle_right_type", 1, np.int32)):
+            data = np.empty(width * n, dtype=dtype)
+            points.foreach_get(name, data)
+            fields[name] = data.reshape(n, width)[keep].ravel()
+        points.clear()
+        points.add(len(keep))
+        for name, data in fields.items():
+            points.foreach_set(name, data)
+    else:
+        for i in np.flatnonzero(remove)[::-1]:
+            points.remove(points[int(i)], fast=True)
+    fc.update()
+    return removed
+
+
+@blender_function(dependencies=[write_fcurve_points, get_or_create_fcurve])
+def write_keyframe_columns(targets, data_paths, target, data_path, index, frame, value, interpolation):
+    # target and data_path are ids into the targets and data_paths tables, keys are grouped per channel so every
+    # f-curve is looked up and written once
+    target = np.asarray(target, dtype=int)
+    data_path = np.asarray(data_path, dtype=int)
+    index = np.asarray(index, dtype=int)
+    frame = np.asarray(frame, dtype=float)
+    value = np.asarray(value, dtype=float)
+    interpolation = np.asarray(interpolation, dtype=np.int32)
+    if len(target) == 0:
+        return
+
+    order = np.lexsort((index, data_path, target))
+    channel = np.stack([target[order], data_path[order], index[order]], axis=1)
+    starts = np.flatnonzero(np.r_[True, np.any(channel[1:] != channel[:-1], axis=1)])
+    ends = np.r_[starts[1:], len(order)]
+    for s, e in zip(starts, ends):
+        sel = order[s:e]
+        fc = get_or_create_fcurve(targets[target[sel[0]]], data_paths[data_path[sel[0]]], index=int(index[sel[0]]))
+        write_fcurve_points(fc, frame[sel], value[sel], interpolation[sel])
+
+
+@blender_function(dependencies=[write_keyframe_columns])
+def apply_baked_keyframes(baked):
+    targets = []
+    for kind, name in baked["targets"]:
+        if kind == "material":
+            targets.append(bpy.data.materials[name].node_tree)
+        elif kind == "data":
+            targets.append(bpy.data.objects[name].data)
+        else:
+            targets.append(bpy.data.objects[name])
+
+    write_keyframe_columns(targets, baked["data_paths"], baked["target"], baked["data_path"], baked["index"],
+                           baked["frame"], baked["value"], baked["interpolation"])
+    return baked["frame_end"]
+
+
+class KeyframeStore(BlenderClass):
+    dependencies = [write_keyframe_columns]
+    # targets and data paths are stored as ids into the targets and data_paths tables
+    columns = (("target", "i4"), ("data_path", "i4"), ("index", "i4"), ("frame", "f8"), ("value", "f8"),
+               ("interpolation", "i4"))
+
+    def __init__(self, capacity=1024):
+        self.targets = []
+        self.data_paths = []
+        self._target_ids = {}
+        self._data_path_ids = {}
+        self._size = 0
+        self._data = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.columns}
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, column):
+        # views, editing them edits the timeline
+        return self._data[column][:self._size]
+
+    def target_id(self, target):
+        if target not in self._target_ids:
+            self._target_ids[target] = len(self.targets)
+            self.targets.append(target)
+        return self._target_ids[target]
+
+    def data_path_id(self, data_path):
+        if data_path not in self._data_path_ids:
+            self._data_path_ids[data_path] = len(self.data_paths)
+            self.data_paths.append(data_path)
+        return self._data_path_ids[data_path]
+
+    def _reserve(self, n):
+        capacity = len(self._data["frame"])
+        if self._size + n <= capacity:
+            return
+        capacity = max(2 * capacity, self._size + n)
+        for name, column in self._data.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._data[name] = grown
+
+    def append(self, target, data_path, index, frame, value, interpolation=2):
+        self._reserve(1)
+        i = self._size
+        data = self._data
+        data["target"][i] = self.target_id(target)
+        data["data_path"][i] = self.data_path_id(data_path)
+        data["index"][i] = index
+        data["frame"][i] = frame
+        data["value"][i] = value
+        data["interpolation"][i] = interpolation
+        self._size += 1
+
+    def extend(self, target, data_path, index, frame, value, interpolation=2):
+        # every argument may be a scalar or an array, target may also be a list of targets
+        if isinstance(target, (list, tuple)):
+            target = [self.target_id(t) for t in target]
+        else:
+            target = self.target_id(target)
+        if isinstance(data_path, (list, tuple)):
+            data_path = [self.data_path_id(p) for p in data_path]
+        else:
+            data_path = self.data_path_id(data_path)
+        self.extend_ids(target, data_path, index, frame, value, interpolation)
+
+    def extend_ids(self, target, data_path, index, frame, value, interpolation=2):
+        # like extend with target and data path ids from target_id/data_path_id, which may be shaped arrays
+        arrays = np.broadcast_arrays(target, data_path, index, frame, value, interpolation)
+        n = arrays[0].size
+        self._reserve(n)
+        for (name, dtype), array in zip(self.columns, arrays):
+            self._data[name][self._size:self._size + n] = array.ravel()
+        self._size += n
+
+    def select(self, target=None, data_path=None, index=None, start=None, end=None):
+        # mask of the keys matching every given filter, frames are selected by start < frame <= end
+        mask = np.ones(self._size, dtype=bool)
+        if target is not None:
+            if target not in self._target_ids:
+                return np.zeros(self._size, dtype=bool)
+            mask &= self["target"] == self._target_ids[target]
+        if data_path is not None:
+            if data_path not in self._data_path_ids:
+                return np.zeros(self._size, dtype=bool)
+            mask &= self["data_path"] == self._data_path_ids[data_path]
+        if index is not None:
+            mask &= self["index"] == index
+        if start is not None:
+            mask &= self["frame"] > start
+        if end is not None:
+            mask &= self["frame"] <= end
+        return mask
+
+    def query(self, mask=None, **filters):
+        if mask is None:
+            mask = self.select(**filters)
+        return {name: self[name][mask] for name, dtype in self.columns}
+
+    def remove(self, mask=None, **filters):
+        if mask is None:
+            mask = self.select(**filters)
+        keep = np.flatnonzero(~mask)
+        removed = self._size - len(keep)
+        if removed:
+            for name, column in self._data.items():
+                column[:len(keep)] = column[keep]
+            self._size = len(keep)
+        return removed
+
+    def clear(self):
+        self._size = 0
+
+    def simplify(self, tolerance=1e-6):
+        # removes keys that do not change the written curves: earlier keys on the same frame, CONSTANT keys
+        # holding the previous value and LINEAR keys within tolerance (vertically) of the line through their
+        # kept neighbours (Ramer-Douglas-Peucker). only keys in the store are seen, points already in an
+        # f-curve are not. returns the number of removed keys per target
+        n = self._size
+        if n < 3:
+            return {}
+        columns = [self[name] for name, dtype in self.columns]
+        target, data_path, index, frame, value, interpolation = columns
+        order = np.lexsort((frame, index, data_path, target))
+        t, p, c, f, v, ip = [column[order] for column in columns]
+
+        def continues(rows):
+            # True where rows[i + 1] is on the same channel as rows[i]
+            return (t[rows[1:]] == t[rows[:-1]]) & (p[rows[1:]] == p[rows[:-1]]) & (c[rows[1:]] == c[rows[:-1]])
+
+        remove = np.zeros(n, dtype=bool)
+        rows = np.arange(n)
+        remove[:-1] = continues(rows) & (f[1:] == f[:-1])
+
+        rows = rows[~remove]
+        kv, kip = v[rows], ip[rows]
+        hold = continues(rows) & (kip[:-1] == 0) & (kip[1:] == 0) & (np.abs(kv[1:] - kv[:-1]) <= tolerance)
+        remove[rows[1:][hold]] = True
+
+        rows = rows[np.r_[True, ~hold]]
+        kf, kv = f[rows], v[rows]
+        linear = continues(rows) & (ip[rows[:-1]] == 1)
+        edges = np.diff(np.r_[0, linear.astype(np.int8), 0])
+        for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+            stack = [(start, end)]
+            while stack:
+                a, b = stack.pop()
+                if b - a < 2:
+                    continue
+                line = kv[a] + (kv[b] - kv[a]) * (kf[a + 1:b] - kf[a]) / (kf[b] - kf[a])
+                distance = np.abs(kv[a + 1:b] - line)
+                m = int(np.argmax(distance))
+                if distance[m] > tolerance:
+                    stack.append((a, a + 1 + m))
+                    stack.append((a + 1 + m, b))
+                else:
+                    remove[rows[a + 1:b]] = True
+
+        mask = np.zeros(n, dtype=bool)
+        mask[order[remove]] = True
+        counts = np.bincount(target[mask], minlength=len(self.targets))
+        self.remove(mask)
+        return {self.targets[i]: int(count) for i, count in enumerate(counts) if count}
 
-class BlenderAnimationTracker(BlenderClass):
-    dependencies = [Material, BlenderObject]
+    def write(self):
+        write_keyframe_columns(self.targets, self.data_paths, *[self[name] for name, dtype in self.columns])
+        self.clear()
 
+
+class FrameTimeline(BlenderClass):
+    # the frame and time bookkeeping shared by BlenderAnimationTracker and the host side KeyframeRecorder
     def __init__(self, fps=24):
-        self._finish_hooks = []
         self._names_frames = {}
         self.current_frame = 0
         self._max_frame = 0
@@ -44,6 +365,34 @@ class BlenderAnimationTracker(BlenderClass):
     def run_seconds(self, s):
         self.run_frames(self.seconds_to_frames(s))
 
+    def save_frame(self, name):
+        self._names_frames[name]=self.current_frame
+
+    def get_frame(self, name):
+        return self._names_frames[name]
+
+
+class BlenderAnimationTracker(FrameTimeline):
+    dependencies = [Material, BlenderObject, KeyframeStore, remove_fcurve_points]
+    # in the order of blender's raw interpolation values, the codes are written with foreach_set
+    interpolations = ("CONSTANT", "LINEAR", "BEZIER", "BACK", "BOUNCE", "CIRC", "CUBIC", "ELASTIC", "EXPO", "QUAD",
+                      "QUART", "QUINT", "SINE")
+
+    def __init__(self, fps=24, batched=False, simplify=None):
+        super().__init__(fps)
+        self._finish_hooks = []
+        # in batched mode keyframes are collected in the store and written on flush, until then they can be
+        # queried and edited through self.keyframes
+        self.batched = batched
+        self.keyframes = KeyframeStore()
+        # tolerance for simplify() on every flush, None keeps every key
+        self.simplify_tolerance = simplify
+        self.removed_keyframes = {}
+        self._channels = {}
+        # (owner, data path) -> [action, [(fcurve, sorted keyframe frames)]], positions in the frame lists are
+        # the keyframe point indices, so interpolation updates need no scan of the keyframe points
+        self._keyframe_index = {}
+
     def finish_animation(self,start=None,end=None,current=None):
         if start is None:
             start = 0
@@ -59,6 +408,8 @@ class BlenderAnimationTracker(BlenderClass):
         if isinstance(current,str):
             current = self.get_frame(current)
 
+        self.flush()
+
         bpy.context.scene.frame_start = start
         bpy.context.scene.frame_end = end
         bpy.context.scene.frame_current = current
@@ -71,63 +422,131 @@ class BlenderAnimationTracker(BlenderClass):
     def clear_all(self):
         for a in bpy.data.actions:
             bpy.data.actions.remove(a)
-
-
-    def insert_keyframe(self,obj,data_path):
-        return obj.keyframe_insert(data_path=data_path, frame=self.current_frame)
+        self._keyframe_index = {}
+
+    def _channel(self, obj, data_path):
+        key = (obj, data_path)
+        if key not in self._channels:
+            self._channels[key] = (obj.id_data, obj.path_from_id(data_path))
+        return self._channels[key]
+
+    def _indexed_fcurves(self, obj, data_path, channel):
+        owner, path = channel
+        anim = owner.animation_data
+        action = anim.action if anim is not None else None
+        entry = self._keyframe_index.get(channel)
+        if entry is None or entry[0] != action or not entry[1]:
+            # one find per array index, the action of a node tree holds the curves of every animated socket
+            fcurves = []
+            if action is not None:
+                try:
+                    size = len(getattr(obj, data_path))
+                except TypeError:
+                    size = 1
+                for index in range(size):
+                    fc = action.fcurves.find(path, index=index)
+                    if fc is not None:
+                        fcurves.append((fc, self._fcurve_frames(fc)))
+            entry = self._keyframe_index[channel] = [action, fcurves]
+        return entry[1]
+
+    @staticmethod
+    def _fcurve_frames(fc):
+        co = np.empty(2 * len(fc.keyframe_points))
+        fc.keyframe_points.foreach_get("co", co)
+        return co[0::2].tolist()
+
+    def insert_keyframe(self,obj,data_path,interpolation=None):
+        if self.batched:
+            return self._queue_keyframe(obj, data_path, interpolation)
+
+        from bisect import bisect_left
+        kf = obj.keyframe_insert(data_path=data_path, frame=self.current_frame)
+        channel = self._channel(obj, data_path)
+        if interpolation is None and channel not in self._keyframe_index:
+            return kf
+
+        # blender stores frames as float32, the index holds them the same way
+        frame = float(np.float32(self.current_frame))
+        for fc, frames in self._indexed_fcurves(obj, data_path, channel):
+            i = bisect_left(frames, frame)
+            if i == len(frames) or frames[i] != frame:
+                frames.insert(i, frame)
+            if len(frames) != len(fc.keyframe_points):
+                # keys were added or removed behind the index
+                frames[:] = self._fcurve_frames(fc)
+                i = bisect_left(frames, frame)
+            if interpolation is not None:
+                fc.keyframe_points[i].interpolation = interpolation
+        return kf
+
+    def _queue_keyframe(self, obj, data_path, interpolation=None):
+        owner, path = self._channel(obj, data_path)
+        value = getattr(obj, data_path)
+        try:
+            values = [float(v) for v in value]
+        except TypeError:
+            values = [float(value)]
+        code = self.interpolations.index("BEZIER" if interpolation is None else interpolation)
+        self.keyframes.extend(owner, path, np.arange(len(values)), self.current_frame, values, code)
+        return True
+
+    def simplify(self, tolerance=1e-6):
+        # only the batched store can be simplified, keys inserted directly are already in blender
+        # counts are keyed by the owning ID, names repeat across ID types and every material's node tree is
+        # called "Shader Nodetree"
+        removed = self.keyframes.simplify(tolerance)
+        for owner, count in removed.items():
+            self.removed_keyframes[owner] = self.removed_keyframes.get(owner, 0) + count
+        return removed
+
+    def flush(self):
+        if self.simplify_tolerance is not None:
+            self.simplify(self.simplify_tolerance)
+        self.keyframes.write()
 
     def performe_keyframe_op(self, obj, data_path, frames=0, reverse=False, interpolation=None):
         if frames is None:
             frames = 1
-        kf = self.insert_keyframe(obj,data_path=data_path)
-
-        if interpolation is not None:
-            action = obj.animation_data.action
-            # kf.interpolation ="LINEAR"
-            fcurves = [fc for fc in action.fcurves if fc.data_path == data_path]
-            for fc in fcurves:
-                for kfp in fc.keyframe_points:
-                    if kfp.co.x == self.current_frame:
-                        kfp.interpolation = interpolation
+        kf = self.insert_keyframe(obj,data_path=data_path,interpolation=interpolation)
 
         def compl():
             if reverse:
                 f = self.current_frame
             self.run_frames(frames)
-            kf = obj.keyframe_insert(data_path=data_path, frame=self.current_frame)
-            if interpolation is not None:
-                action = obj.animation_data.action
-                # kf.interpolation ="LINEAR"
-                fcurves = [fc for fc in action.fcurves if fc.data_path == data_path]
-                for fc in fcurves:
-                    for kfp in fc.keyframe_points:
-                        if kfp.co.x == self.current_frame:
-                            kfp.interpolation = interpolation
+            kf = self.insert_keyframe(obj,data_path=data_path,interpolation=interpolation)
             if reverse:
                 self.go_to_frame(f)
 
         return compl
 
+    def _animate(self, obj, data_path, value, time=0, reverse=False, interpolation=None):
+        # performe_keyframe_op without the closure: keys the current value, assigns value and keys it again
+        # after time seconds
+        frames = self.seconds_to_frames(time)
+        if frames is None:
+            frames = 1
+        self.insert_keyframe(obj, data_path=data_path, interpolation=interpolation)
+        setattr(obj, data_path, value)
+        start = self.current_frame
+        self.run_frames(frames)
+        self.insert_keyframe(obj, data_path=data_path, interpolation=interpolation)
+        if reverse:
+            self.go_to_frame(start)
+
     def move_object(self, obj, x=0, y=0, z=0, delta=False, time=0, reverse=False, interpolation=None):
         if time is None:
             time = self.frames_to_seconds(1)
         if isinstance(obj, BlenderObject):
             obj = obj.obj
-        kfcb = self.performe_keyframe_op(obj, "location", frames=self.seconds_to_frames(time), reverse=reverse,
-                                         interpolation=interpolation)
 
         vec = np.array([x, y, z], dtype=float)
         curr_loc = np.array(obj.location, dtype=float)
         if delta:
-            obj.location = curr_loc + vec
-            delta = vec
-        else:
-            obj.location = vec
-            delta = np.array(obj.location) - curr_loc
-
-        kfcb()
-
-        return delta
+            self._animate(obj, "location", curr_loc + vec, time, reverse, interpolation)
+            return vec
+        self._animate(obj, "location", vec, time, reverse, interpolation)
+        return np.array(obj.location) - curr_loc
 
     def bevel_start_end(self, obj,start=0,end=1, time=0, reverse=False, interpolation=None):
         if time is None:
@@ -135,123 +554,155 @@ class BlenderAnimationTracker(BlenderClass):
         if isinstance(obj, BlenderObject):
             obj = obj.obj
 
-        kfcb1 = self.performe_keyframe_op(obj.data, "bevel_factor_end", frames=self.seconds_to_frames(time), reverse=reverse,
-                                         interpolation=interpolation)
-        kfcb2 = self.performe_keyframe_op(obj.data, "bevel_factor_start", frames=self.seconds_to_frames(time), reverse=reverse,
-                                         interpolation=interpolation)
-
-        obj.data.bevel_factor_end = end
-        obj.data.bevel_factor_start = start
-
-        kfcb1()
-        kfcb2()
-
+        self._animate(obj.data, "bevel_factor_end", end, time, True, interpolation)
+        self._animate(obj.data, "bevel_factor_start", start, time, reverse, interpolation)
 
     def scale_object(self, obj, x=0, y=0, z=0, delta=False, time=0, reverse=False, interpolation=None):
         if time is None:
             time = self.frames_to_seconds(1)
         if isinstance(obj, BlenderObject):
             obj = obj.obj
-        kfcb = self.performe_keyframe_op(obj, "scale", frames=self.seconds_to_frames(time), reverse=reverse,
-                                         interpolation=interpolation)
 
         vec = np.array([x, y, z], dtype=float)
         curr_scale = np.array(obj.scale, dtype=float)
         if delta:
-            obj.location = curr_scale * vec
-            delta = vec
-        else:
-            obj.scale = vec
-            delta = np.array(obj.scale) / curr_scale
-
-        kfcb()
-
-        return delta
+            self._animate(obj, "scale", curr_scale * vec, time, reverse, interpolation)
+            return vec
+        self._animate(obj, "scale", vec, time, reverse, interpolation)
+        return np.array(obj.scale) / curr_scale
 
     def move_objects(self, objs, x=0, y=0, z=0, delta=False, time=0, reverse=False, interpolation=None):
+        # every object is moved by the delta of the first one
         if time is None:
             time = self.frames_to_seconds(1)
-        delta =  self.move_object(objs[0],x=x,y=y,z=z,delta=delta,time=time,reverse=True,interpolation=interpolation)
+        vec = np.array([x, y, z], dtype=float)
+        if not delta:
+            first = objs[0].obj if isinstance(objs[0], BlenderObject) else objs[0]
+            vec = vec - np.array(first.location, dtype=float)
+        self.move_many(objs, vec[None, :], delta=True, time=time, reverse=reverse, interpolation=interpolation)
+        return vec
+
+    def insert_keyframes(self, objs, data_path, frames, values, interpolation=None):
+        # values has shape (F, N, k) or (F, N) for the F frames and N objects, all keys go through one store
+        # extend, in direct mode a temporary store is written right away
+        frames = np.asarray(frames, dtype=float).reshape(-1)
+        values = np.asarray(values, dtype=float).reshape(len(frames), len(objs), -1)
+        rows = np.broadcast_to(np.arange(len(objs)), values.shape[:2])
+        self.insert_keyframe_rows(objs, data_path, rows.ravel(), np.repeat(frames, len(objs)),
+                                  values.reshape(len(frames) * len(objs), -1), interpolation=interpolation)
+
+    def insert_keyframe_rows(self, objs, data_path, rows, frames, values, interpolation=None):
+        # one key per row: objs[rows[i]] gets values[i] (k channels) at frames[i], for ragged timelines
+        objs = [obj.obj if isinstance(obj, BlenderObject) else obj for obj in objs]
+        rows = np.asarray(rows, dtype=int)
+        frames = np.asarray(frames, dtype=float)
+        values = np.asarray(values, dtype=float).reshape(len(rows), -1)
+        if len(rows) == 0:
+            return
+        channels = [self._channel(obj, data_path) for obj in objs]
+        store = self.keyframes if self.batched else KeyframeStore(capacity=values.size)
+        targets = np.array([store.target_id(owner) for owner, path in channels])
+        paths = np.array([store.data_path_id(path) for owner, path in channels])
+        code = self.interpolations.index("BEZIER" if interpolation is None else interpolation)
+        store.extend_ids(targets[rows][:, None], paths[rows][:, None], np.arange(values.shape[1])[None, :],
+                         frames[:, None], values, code)
+        if not self.batched:
+            for channel in channels:
+                self._keyframe_index.pop(channel, None)
+            store.write()
+        self._max_frame = max(self._max_frame, frames.max())
+
+    def _transform_many(self, objs, data_path, values, delta, time, reverse, interpolation):
+        # values (N, 3) are reached after time seconds from the current values, (F, N, 3) are keyed one row every
+        # time seconds (one frame for time=None or 0) starting at the current frame
+        objs = [obj.obj if isinstance(obj, BlenderObject) else obj for obj in objs]
+        values = np.asarray(values, dtype=float)
+        current = np.array([getattr(obj, data_path) for obj in objs], dtype=float)
+        if delta:
+            values = current * values if data_path == "scale" else current + values
+        if values.ndim == 2:
+            frames = self.seconds_to_frames(time)
+            if frames is None:
+                frames = 1
+            values = np.stack([current, values])
+            frames = self.current_frame + np.array([0, np.ceil(frames)])
+        else:
+            frames = self.current_frame + np.arange(len(values)) * (self.seconds_to_frames(time) or 1)
+        self.insert_keyframes(objs, data_path, frames, values, interpolation=interpolation)
+        for obj, value in zip(objs, values[-1]):
+            setattr(obj, data_path, value)
+        if not reverse:
+            self.go_to_frame(frames[-1])
+        if data_path == "scale":
+            return values[-1] / current
+        return values[-1] - current
 
-        if len(objs)>1:
-            for obj in objs[1:]:
-                self.move_object(obj,*delta,delta=True,time=time,reverse=True,interpolation=interpolation)
+    def move_many(self, objs, positions, delta=False, time=0, reverse=False, interpolation=None):
+        return self._transform_many(objs, "location", positions, delta, time, reverse, interpolation)
 
-        if not reverse:
-            self.run_seconds(time)
-        return delta
+    def rotate_many(self, objs, rotations, delta=False, time=0, reverse=False, interpolation=None):
+        rotations = np.asarray(rotations, dtype=float) * 2 * np.pi / 360
+        return self._transform_many(objs, "rotation_euler", rotations, delta, time, reverse,
+                                    interpolation) * 360 / (2 * np.pi)
 
+    def scale_many(self, objs, scales, delta=False, time=0, reverse=False, interpolation=None):
+        return self._transform_many(objs, "scale", scales, delta, time, reverse, interpolation)
 
     def rotate_object(self, obj, x=0, y=0, z=0, delta=False, animator=None, time=0, reverse=False, interpolation=None):
         if time is None:
             time = self.frames_to_seconds(1)
         if isinstance(obj, BlenderObject):
             obj = obj.obj
-        kfcb = self.performe_keyframe_op(obj, "rotation_euler", frames=self.seconds_to_frames(time), reverse=reverse,
-                                         interpolation=interpolation)
+
         vec = np.array([x, y, z], dtype=float) * 2 * np.pi / 360
         curr_rot = np.array(obj.rotation_euler, dtype=float)
         if delta:
-            obj.rotation_euler = curr_rot + vec
+            self._animate(obj, "rotation_euler", curr_rot + vec, time, reverse, interpolation)
             delta = vec
         else:
-            obj.rotation_euler = vec
+            self._animate(obj, "rotation_euler", vec, time, reverse, interpolation)
             delta = np.array(obj.rotation_euler) - curr_rot
-
-        kfcb()
-
         return delta * 360 / (2 * np.pi)
 
-    def get_animation_data(self, obj):
+    def get_animation_owner(self, obj):
         if isinstance(obj, Material):
-            return obj.mat.node_tree.animation_data
+            return obj.mat.node_tree
         elif isinstance(obj, BlenderObject):
-            return obj.obj.animation_data
+            return obj.obj
         else:
-            return obj.animation_data
+            return obj
+
+    def get_animation_data(self, obj):
+        return self.get_animation_owner(obj).animation_data
+
+    def delete_keyframes(self, objs, ranges):
+        # ranges are (start, end) pairs removing keys with start < frame <= end, None leaves a side open
+        if not isinstance(objs, (list, tuple)):
+            objs = [objs]
+        if len(ranges) and not isinstance(ranges[0], (list, tuple)):
+            ranges = [ranges]
+        ranges = [tuple(r) for r in ranges]
+
+        removed = 0
+        for owner in dict.fromkeys(self.get_animation_owner(obj) for obj in objs):
+            for start, end in ranges:
+                self.keyframes.remove(target=owner, start=start, end=end)
+            for key in [key for key in self._keyframe_index if key[0] == owner]:
+                del self._keyframe_index[key]
+            anim = owner.animation_data
+            if anim is None or anim.action is None:
+                continue
+            for fc in anim.action.fcurves:
+                removed += remove_fcurve_points(fc, ranges)
+        return removed
 
     def delete_all_after_frame(self, obj, frame):
-        anim = self.get_animation_data(obj)
-        if anim is None:
-            return
-        action = anim.action
-        if action is None:
-            return
-        fcurves = [fc for fc in action.fcurves]
-        for fc in fcurves:
-            for kfp in list(fc.keyframe_points):
-                if kfp.co.x > frame:
-                    #                    action.fcurves.remove(fc)
-                    #                   break
-                    fc.keyframe_points.remove(kfp)
+        return self.delete_keyframes(obj, [(frame, None)])
 
     def change_node_value(self, socket, value, time=0, reverse=False, interpolation=None):
-        node = socket.node
-        cb = self.performe_keyframe_op(socket.socket, "default_value", frames=self.seconds_to_frames(time),
-                                       reverse=reverse, interpolation=None)
-        if interpolation is not None:
-            fc = node.tree.animation_data.action.fcurves.find('nodes["{}"].inputs[{}].default_value'.format(node.name,socket.number))
-            for kfp in fc.keyframe_points:
-                if kfp.co.x == self.current_frame:
-                    kfp.interpolation = interpolation
-
-        socket.value = value
-        cb()
-        if interpolation is not None:
-            fc = node.tree.animation_data.action.fcurves.find('nodes["{}"].inputs[{}].default_value'.format(node.name,socket.number))
-            for kfp in fc.keyframe_points:
-                if kfp.co.x == self.current_frame:
-                    kfp.interpolation = interpolation
-
-        # s="nodes['{}'].inputs[{}].default_value".format(node.name,socket.number)
-        # print(s)
-        # self.performe_keyframe_op(obj.node_tree,s,frames=self.seconds_to_frames(time),reverse=reverse,interpolation=interpolation)
-
-    def save_frame(self, name):
-        self._names_frames[name]=self.current_frame
-
-    def get_frame(self, name):
-        return self._names_frames[name]
+        # keyed like any other property: the (node tree, data path) channel and its f-curves are cached per
+        # socket and refreshed when the tree's action changes
+        self._animate(socket.socket, "default_value", value, time, reverse, interpolation)
 
     def register_finish_hook(self, callable):
         self._finish_hooks.append(callable)
@@ -327,4 +778,4 @@ class Camera(BlenderObject):
             cb = animator.performe_keyframe_op(self._tracker[obj],"influence",frames=frames,reverse=True)
         self._tracker[obj].influence = influence
         if animator:
-            cb()
\ No newline at end of file
+            cb()
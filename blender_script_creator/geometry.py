@@ -1,38 +1,170 @@
 from warnings import warn
 
-from blender_script_creator import bpy, bmesh
+from blender_script_creator import bpy, bmesh, LazyModule
 from blender_script_creator.materials import Material
-from blender_script_creator.modifier import Subsurface, Modifier
+from blender_script_creator.modifier import Subsurface, Modifier, MeshCache
+from blender_script_creator.nodes import Node, connect_node_sockets
 from blender_script_creator.script import blender_function, blender_basic_script, BlenderClass
 
-import numpy as np
+np = LazyModule("numpy")
 
 
-@blender_function(dependencies=[])
+class ObjectIndex(BlenderClass):
+    # scene objects by name and by base name (without .001 style suffixes), built from the scene on first use
+    # and kept current by create_plain_object and BlenderObject, so lookups never scan the scene. objects made
+    # with plain bpy calls after the first lookup have to be added, or the index reset
+    by_name = None
+    by_base_name = None
+
+    @staticmethod
+    def base_name(name):
+        return name.rsplit(".", maxsplit=1)[0]
+
+    @classmethod
+    def build(cls):
+        cls.by_name = {}
+        cls.by_base_name = {}
+        for obj in bpy.context.scene.objects:
+            cls.add(obj)
+
+    @classmethod
+    def reset(cls):
+        cls.by_name = None
+        cls.by_base_name = None
+
+    @classmethod
+    def add(cls, obj):
+        if cls.by_name is None:
+            return
+        cls.by_name[obj.name] = obj
+        cls.by_base_name.setdefault(cls.base_name(obj.name), {})[obj.name] = obj
+
+    @classmethod
+    def discard(cls, name):
+        if cls.by_name is None:
+            return
+        cls.by_name.pop(name, None)
+        same_base = cls.by_base_name.get(cls.base_name(name))
+        if same_base is not None:
+            same_base.pop(name, None)
+            if not same_base:
+                del cls.by_base_name[cls.base_name(name)]
+
+    @classmethod
+    def _valid(cls, obj, name):
+        try:
+            current = obj.name
+        except ReferenceError:
+            return False
+        return current == name or cls.base_name(current) == name
+
+    @classmethod
+    def find(cls, name, deep_search=False):
+        if cls.by_name is None:
+            cls.build()
+        obj = cls.by_name.get(name)
+        if obj is None and deep_search:
+            obj = next(iter(cls.by_base_name.get(name, {}).values()), None)
+        if obj is not None and not cls._valid(obj, name):
+            # renamed or removed behind the index
+            cls.build()
+            return cls.find(name, deep_search=deep_search)
+        return obj
+
+
+class PrimitiveMeshCache(BlenderClass):
+    # mesh datablocks of procedural primitives by constructor parameters, so objects built with the same
+    # parameters link one mesh instead of a copy each. meshes are tagged with their key and found again in later
+    # runs; beyond maxsize the least recently used entry leaves the cache and its mesh is removed once unused
+    maxsize = 32
+    key_property = "primitive_key"
+    meshes = {}
+    hits = 0
+    misses = 0
+    evictions = 0
+    vertices_saved = 0
+    bytes_saved = 0
+
+    @staticmethod
+    def key_name(key):
+        return "_".join(str(k) for k in key)
+
+    @staticmethod
+    def _alive(mesh):
+        try:
+            mesh.name
+        except ReferenceError:
+            return False
+        return True
+
+    @staticmethod
+    def estimate_bytes(mesh):
+        # raw arrays only: vertex positions, edge and loop indices and polygon offsets
+        return 12 * len(mesh.vertices) + 8 * len(mesh.edges) + 8 * len(mesh.loops) + 8 * len(mesh.polygons)
+
+    @classmethod
+    def get(cls, key, build):
+        name = cls.key_name(key)
+        mesh = cls.meshes.pop(name, None)
+        if mesh is None or not cls._alive(mesh):
+            mesh = bpy.data.meshes.get(name)
+            if mesh is None or mesh.get(cls.key_property) != name:
+                mesh = build(name)
+                mesh[cls.key_property] = name
+                cls.misses += 1
+            else:
+                cls._shared(mesh)
+        else:
+            cls._shared(mesh)
+        cls.meshes[name] = mesh
+        while len(cls.meshes) > cls.maxsize:
+            cls.evict(next(iter(cls.meshes)))
+        return mesh
+
+    @classmethod
+    def _shared(cls, mesh):
+        cls.hits += 1
+        cls.vertices_saved += len(mesh.vertices)
+        cls.bytes_saved += cls.estimate_bytes(mesh)
+
+    @classmethod
+    def evict(cls, name):
+        mesh = cls.meshes.pop(name)
+        cls.evictions += 1
+        if cls._alive(mesh) and mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+
+    @classmethod
+    def is_shared(cls, data):
+        return data is not None and (data.users > 1 or data.get(cls.key_property) is not None)
+
+    @classmethod
+    def report(cls):
+        return "primitive meshes: {} built, {} shared, {} evicted, saved {} vertices (~{:.1f} MB)".format(
+            cls.misses, cls.hits, cls.evictions, cls.vertices_saved, cls.bytes_saved / 1e6)
+
+
+@blender_function(dependencies=[ObjectIndex])
 def create_plain_object(name, data=None):
     print("NEW OBJECT", name)
     obj = bpy.data.objects.new(name, data)
     bpy.context.collection.objects.link(obj)
+    ObjectIndex.add(obj)
     return obj
     # bo = BlenderObject(obj, name=name)
     # return bo
 
 
-@blender_function(dependencies=[])
+@blender_function(dependencies=[ObjectIndex])
 def find_object(name, cls=None,deep_search=False, **kwargs):
     if cls is None:
         cls = BlenderObject
 
     if name in BlenderObject.objects:
         return BlenderObject.objects[name]
-    for obj in bpy.context.scene.objects:
-        if obj.name == name:
-            return cls(obj, name=name, **kwargs)
-
-    if deep_search:
-        for obj in bpy.context.scene.objects:
-            if obj.name.rsplit(".", maxsplit=1)[0] == name:
-                return cls(obj, name=name, **kwargs)
+    obj = ObjectIndex.find(name, deep_search=deep_search)
+    if obj is not None:
+        return cls(obj, name=name, **kwargs)
 
 
 @blender_function(dependencies=[find_object])
@@ -51,8 +183,9 @@ def get_or_create_object(name, creator=None, cls=None, **kwargs):
 
 
 class BlenderObject(BlenderClass):
-    dependencies = BlenderClass.dependencies + [Modifier, Material, create_plain_object, get_or_create_object]
-    used_names = []
+    dependencies = BlenderClass.dependencies + [Modifier, MeshCache, Material, ObjectIndex, PrimitiveMeshCache,
+                                                create_plain_object, get_or_create_object]
+    used_names = set()
     objects = {}
 
     def __init__(self, obj, name):
@@ -63,8 +196,9 @@ class BlenderObject(BlenderClass):
             name = obj.name
         if name in self.used_names:
             raise ValueError("object with name '{}' already defined, please rename".format(name))
-        self.used_names.append(name)
+        self.used_names.add(name)
         self.objects[name] = self
+        ObjectIndex.add(obj)
         self._true_name = obj.name
         self.name = name
 
@@ -88,6 +222,11 @@ class BlenderObject(BlenderClass):
             return self.get_modifier(name)
         return mod.apply(self._obj, name)
 
+    def add_mesh_cache(self, filepath, name="mesh_cache", frame_start=0, **kwargs):
+        # streams vertex positions from a .pc2 file (see pointcache.PC2Writer) in vertex order of the mesh
+        return self.add_modifier(name, MeshCache(cache_format="PC2", filepath=filepath, frame_start=frame_start,
+                                                 **kwargs))
+
     def remove_modifier(self,name):
         self._obj.modifiers.remove(name)
 
@@ -171,7 +310,10 @@ class BlenderObject(BlenderClass):
     @property
     def material(self):
         if self._material is None:
-            if self._obj.data is not None:
+            if self._obj.material_slots and self._obj.material_slots[0].link == 'OBJECT':
+                if self._obj.material_slots[0].material is not None:
+                    self._material = Material(self._obj.material_slots[0].material)
+            elif self._obj.data is not None:
                 if hasattr(self._obj.data, "materials"):
                     if self._obj.data.materials:
                         self.material = Material(self._obj.data.materials[0])
@@ -180,7 +322,15 @@ class BlenderObject(BlenderClass):
     @material.setter
     def material(self, mat: Material):
         self._material = mat
-        if self._obj.data.materials:
+        if PrimitiveMeshCache.is_shared(self._obj.data):
+            # a material on shared data would change every object using it, so it goes into an object slot
+            if not self._obj.material_slots:
+                self._obj.data.materials.append(None)
+            slot = self._obj.material_slots[0]
+            slot.link = 'OBJECT'
+            if slot.material != mat.mat:
+                slot.material = mat.mat
+        elif self._obj.data.materials:
             if self._obj.data.materials[0] != mat.mat:
                 self._obj.data.materials[0] = mat.mat
         else:
@@ -194,6 +344,7 @@ class BlenderObject(BlenderClass):
     @classmethod
     def delete(cls, obj):
         cls.unregister(obj)
+        ObjectIndex.discard(obj._obj.name)
         bpy.ops.object.select_all(action='DESELECT')
         obj._obj.select_set(True)
         bpy.ops.object.delete()
@@ -215,19 +366,28 @@ class BlenderObject(BlenderClass):
 
 
 class Sphere(BlenderObject):
-    dependencies = BlenderObject.dependencies + [Subsurface]
+    dependencies = BlenderObject.dependencies + [Subsurface, PrimitiveMeshCache]
 
     def __init__(self, obj, name, dia=1):
         super().__init__(obj, name)
 
-    @classmethod
-    def new(cls, name, dia=1):
+    @staticmethod
+    def build_mesh(name, dia=1, u_segments=32, v_segments=16):
         mesh = bpy.data.meshes.new(name)
-        uvsphere = Sphere(create_plain_object(name, mesh), name=name)
         bm = bmesh.new()
-        bmesh.ops.create_uvsphere(bm, u_segments=32, v_segments=16, diameter=dia)
+        bmesh.ops.create_uvsphere(bm, u_segments=u_segments, v_segments=v_segments, diameter=dia)
         bm.to_mesh(mesh)
         bm.free()
+        return mesh
+
+    @classmethod
+    def new(cls, name, dia=1, u_segments=32, v_segments=16, shared=True):
+        if shared:
+            mesh = PrimitiveMeshCache.get(("uv_sphere", dia, u_segments, v_segments),
+                                          lambda key_name: Sphere.build_mesh(key_name, dia, u_segments, v_segments))
+        else:
+            mesh = Sphere.build_mesh(name, dia, u_segments, v_segments)
+        uvsphere = Sphere(create_plain_object(name, mesh), name=name)
         uvsphere.add_modifier('spherification', Subsurface(levels=2, render_levels=4))
         return uvsphere
 
@@ -238,6 +398,9 @@ class Connection(BlenderObject):
         super().__init__(obj, name)
         self._resolution = resolution
         self._obj.data.bevel_depth = d
+        for point in self._obj.data.splines[0].bezier_points:
+            point.handle_left_type = 'VECTOR'
+            point.handle_right_type = 'VECTOR'
         self.set_start_end(p1, p2)
         self._obj.data.bevel_factor_mapping_start = 'SPLINE'
         self._obj.data.bevel_factor_mapping_end = 'SPLINE'
@@ -275,30 +438,110 @@ class Connection(BlenderObject):
         self.set_start_end(self.start, end)
 
     def set_start_end(self, start, end):
-        start = np.array(start)
-        end = np.array(end)
-        self._obj.location = (0, 0, 0)
+        start = np.array(start, dtype=float)
+        end = np.array(end, dtype=float)
         o = (start + end) / 2
+        # both control points and their vector handles, a third of the way to the other point, in three calls
+        third = (end - start) / 3
+        points = self._obj.data.splines[0].bezier_points
+        points.foreach_set("co", np.concatenate([start - o, end - o]))
+        points.foreach_set("handle_left", np.concatenate([start - o - third, end - o - third]))
+        points.foreach_set("handle_right", np.concatenate([start - o + third, end - o + third]))
+        self._obj.location = o
+        self._obj.data.resolution_u = max(1, int(np.ceil(self._resolution * np.linalg.norm(end - start))))
 
-        self._obj.data.splines[0].bezier_points[0].co = start - o
-        self._obj.data.splines[0].bezier_points[0].handle_left_type = 'VECTOR'
+    @classmethod
+    def new(cls, name, **kwargs):
+        curve = bpy.data.curves.new(name, "CURVE")
+        curve.dimensions = '3D'
+        curve.fill_mode = 'FULL'
+        spline = curve.splines.new("BEZIER")
+        spline.bezier_points.add(1)
+        c = cls(create_plain_object(name, curve), name=name, **kwargs)
+        return c
 
-        self._obj.data.splines[0].bezier_points[1].co = end - o
-        self._obj.data.splines[0].bezier_points[1].handle_left_type = 'VECTOR'
-        self._obj.location = o
 
-        self._obj.data.resolution_u = self._resolution*self.length
+class ConnectionBatch(BlenderObject):
+    # many straight beams as two point POLY splines of a single curve object, all start and end points are
+    # read and written as (N, 2, 3) arrays with one foreach call per spline
+    def __init__(self, obj, name, d=1, resolution=4):
+        super().__init__(obj, name)
+        self._obj.data.bevel_depth = d
+        self._obj.data.bevel_resolution = resolution
+        self._points = [spline.points for spline in self._obj.data.splines]
+
+    def __len__(self):
+        return len(self._points)
+
+    @property
+    def dia(self):
+        return self._obj.data.bevel_depth
+
+    @dia.setter
+    def dia(self, dia):
+        self._obj.data.bevel_depth = dia
+
+    @staticmethod
+    def _homogeneous(points):
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2, 3)
+        return np.concatenate([points, np.ones(points.shape[:2] + (1,), dtype=np.float32)], axis=2)
+
+    def add(self, points):
+        # appends one spline per (2, 3) row of points
+        points = self._homogeneous(points)
+        splines = self._obj.data.splines
+        for row in points:
+            spline = splines.new("POLY")
+            spline.points.add(1)
+            spline.points.foreach_set("co", row.ravel())
+            self._points.append(spline.points)
+        self._obj.data.update_tag()
+
+    def set_points(self, points):
+        points = self._homogeneous(points)
+        if len(points) != len(self):
+            raise ValueError("expected {} beams, got {}".format(len(self), len(points)))
+        for spline_points, row in zip(self._points, points):
+            spline_points.foreach_set("co", row.ravel())
+        self._obj.data.update_tag()
+
+    def get_points(self):
+        points = np.empty((len(self), 8), dtype=np.float32)
+        for spline_points, row in zip(self._points, points):
+            spline_points.foreach_get("co", row)
+        return points.reshape(-1, 2, 4)[:, :, :3]
 
+    @property
+    def starts(self):
+        return self.get_points()[:, 0]
+
+    @property
+    def ends(self):
+        return self.get_points()[:, 1]
+
+    def keyframe_points(self, tracker, points, frames=None, interpolation=None):
+        # (N, 2, 3) or (F, N, 2, 3) points keyed at frames (one per row from the current frame by default)
+        # through the tracker's bulk keyframe path, the last row becomes the current state
+        points = np.asarray(points, dtype=float)
+        if points.ndim == 3:
+            points = points[None]
+        values = points.reshape(len(points), 2 * len(self), 3)
+        if frames is None:
+            frames = tracker.current_frame + np.arange(len(points))
+        items = [point for spline_points in self._points for point in spline_points]
+        tracker.insert_keyframes(items, "co", frames, values, interpolation=interpolation)
+        self.set_points(points[-1])
 
     @classmethod
-    def new(cls, name, **kwargs):
-        bpy.ops.curve.primitive_bezier_curve_add()
-        curve = bpy.context.object
-        curve.name = name
-        curve.data.dimensions = '3D'
-        curve.data.fill_mode = 'FULL'
-        c = cls(curve, name=name,**kwargs)
-        return c
+    def new(cls, name, points=None, **kwargs):
+        curve = bpy.data.curves.new(name, "CURVE")
+        curve.dimensions = '3D'
+        curve.fill_mode = 'FULL'
+        batch = cls(create_plain_object(name, curve), name=name, **kwargs)
+        if points is not None:
+            batch.add(points)
+        return batch
+
 
 class BlenderText(BlenderObject):
     def __init__(self, obj, name, text="lorem",size=1,align_x = 'CENTER',align_y = 'CENTER'):
@@ -347,6 +590,251 @@ class BlenderText(BlenderObject):
         return text
 
 
+class Mesh(BlenderClass):
+    # arbitrary mesh data built from and read back into numpy arrays, every property is moved with one
+    # foreach_set/foreach_get call instead of per element python
+    dependencies = BlenderClass.dependencies + [BlenderObject, create_plain_object]
+
+    def __init__(self, mesh):
+        self._mesh = mesh
+
+    @property
+    def mesh(self):
+        return self._mesh
+
+    @property
+    def name(self):
+        return self._mesh.name
+
+    @staticmethod
+    def _face_loops(faces):
+        # (F, k) arrays or ragged sequences of vertex indices to flat loop vertex indices, loop starts and totals
+        if isinstance(faces, np.ndarray) and faces.ndim == 2:
+            totals = np.full(len(faces), faces.shape[1], dtype=np.int32)
+            loops = faces.astype(np.int32).ravel()
+        else:
+            faces = [np.asarray(f, dtype=np.int32) for f in faces]
+            totals = np.array([len(f) for f in faces], dtype=np.int32)
+            loops = np.concatenate(faces) if faces else np.empty(0, dtype=np.int32)
+        starts = (np.cumsum(totals) - totals).astype(np.int32)
+        return loops, starts, totals
+
+    @classmethod
+    def from_numpy(cls, vertices, faces, uvs=None, normals=None, name="mesh"):
+        # uvs (L, 2) and normals (L, 3) are given per loop or per vertex (V, 2)/(V, 3)
+        vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        loops, starts, totals = cls._face_loops(faces)
+        mesh = bpy.data.meshes.new(name)
+        mesh.vertices.add(len(vertices))
+        mesh.loops.add(len(loops))
+        mesh.polygons.add(len(starts))
+        mesh.vertices.foreach_set("co", vertices.ravel())
+        mesh.loops.foreach_set("vertex_index", loops)
+        mesh.polygons.foreach_set("loop_start", starts)
+        if bpy.app.version < (4, 0, 0):
+            mesh.polygons.foreach_set("loop_total", totals)
+        mesh.update(calc_edges=True)
+        m = cls(mesh)
+        if uvs is not None:
+            m.set_uvs(uvs)
+        if normals is not None:
+            m.set_normals(normals)
+        return m
+
+    def set_uvs(self, uvs, layer="UVMap"):
+        uvs = np.asarray(uvs, dtype=np.float32).reshape(-1, 2)
+        if len(uvs) != len(self._mesh.loops):
+            uvs = uvs[self.loop_vertices()]
+        uv_layer = self._mesh.uv_layers.get(layer) or self._mesh.uv_layers.new(name=layer)
+        uv_layer.data.foreach_set("uv", uvs.ravel())
+
+    def set_normals(self, normals):
+        mesh = self._mesh
+        normals = np.asarray(normals, dtype=np.float32).reshape(-1, 3)
+        mesh.polygons.foreach_set("use_smooth", np.ones(len(mesh.polygons), dtype=bool))
+        if bpy.app.version < (4, 1, 0):
+            mesh.use_auto_smooth = True
+        if len(normals) == len(mesh.loops):
+            mesh.normals_split_custom_set(normals)
+        else:
+            mesh.normals_split_custom_set_from_vertices(normals)
+
+    def vertices(self):
+        co = np.empty(3 * len(self._mesh.vertices), dtype=np.float32)
+        self._mesh.vertices.foreach_get("co", co)
+        return co.reshape(-1, 3)
+
+    def loop_vertices(self):
+        loops = np.empty(len(self._mesh.loops), dtype=np.int32)
+        self._mesh.loops.foreach_get("vertex_index", loops)
+        return loops
+
+    def faces(self):
+        # an (F, k) array when all faces have k vertices, a list of per face arrays otherwise
+        polygons = self._mesh.polygons
+        starts = np.empty(len(polygons), dtype=np.int32)
+        totals = np.empty(len(polygons), dtype=np.int32)
+        polygons.foreach_get("loop_start", starts)
+        polygons.foreach_get("loop_total", totals)
+        loops = self.loop_vertices()
+        if len(totals) and np.all(totals == totals[0]) and np.all(starts == np.arange(len(starts)) * totals[0]):
+            return loops.reshape(-1, totals[0])
+        return [loops[s:s + t] for s, t in zip(starts, totals)]
+
+    def uvs(self, layer=None):
+        uv_layers = self._mesh.uv_layers
+        uv_layer = uv_layers.active if layer is None else uv_layers.get(layer)
+        if uv_layer is None:
+            return None
+        uvs = np.empty(2 * len(self._mesh.loops), dtype=np.float32)
+        uv_layer.data.foreach_get("uv", uvs)
+        return uvs.reshape(-1, 2)
+
+    def normals(self):
+        # per loop normals, custom split normals included
+        mesh = self._mesh
+        normals = np.empty(3 * len(mesh.loops), dtype=np.float32)
+        if hasattr(mesh, "corner_normals"):
+            mesh.corner_normals.foreach_get("vector", normals)
+        else:
+            mesh.calc_normals_split()
+            mesh.loops.foreach_get("normal", normals)
+        return normals.reshape(-1, 3)
+
+    def to_numpy(self):
+        return self.vertices(), self.faces(), self.uvs(), self.normals()
+
+    def to_object(self, name=None):
+        if name is None:
+            name = self._mesh.name
+        return BlenderObject(create_plain_object(name, self._mesh), name)
+
+
+class InstancedObject(BlenderObject):
+    # N copies of a prototype object as a single object: a mesh with one vertex per instance, rotation and scale
+    # point attributes and a geometry nodes modifier instancing the prototype on every point
+    dependencies = BlenderObject.dependencies + [Node, connect_node_sockets]
+    attributes = ("rotation", "scale")
+
+    def __init__(self, obj, name, prototype=None):
+        super().__init__(obj, name)
+        self.prototype = prototype
+        self._elements = {}
+
+    def __len__(self):
+        return len(self.mesh.vertices)
+
+    @property
+    def mesh(self):
+        return self._obj.data
+
+    @classmethod
+    def new(cls, name, prototype, positions, rotations=None, scales=None, hide_prototype=True):
+        if isinstance(prototype, BlenderObject):
+            prototype = prototype.obj
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        mesh = bpy.data.meshes.new(name)
+        mesh.vertices.add(len(positions))
+        for attribute in cls.attributes:
+            mesh.attributes.new(attribute, "FLOAT_VECTOR", "POINT")
+        instances = cls(create_plain_object(name, mesh), name, prototype=prototype)
+        instances.set_transforms(positions,
+                                 np.zeros_like(positions) if rotations is None else rotations,
+                                 np.ones_like(positions) if scales is None else scales)
+        instances.build_node_tree(name)
+        if hide_prototype:
+            prototype.hide_render = True
+            prototype.hide_viewport = True
+        return instances
+
+    @staticmethod
+    def _enabled_output(node):
+        # named attribute nodes have one output per data type before blender 4
+        for socket in node.outputs.values():
+            if socket.socket.enabled:
+                return socket
+
+    def build_node_tree(self, name):
+        tree = bpy.data.node_groups.new(name, "GeometryNodeTree")
+        if hasattr(tree, "interface"):
+            tree.interface.new_socket("Geometry", in_out="INPUT", socket_type="NodeSocketGeometry")
+            tree.interface.new_socket("Geometry", in_out="OUTPUT", socket_type="NodeSocketGeometry")
+        else:
+            tree.inputs.new("NodeSocketGeometry", "Geometry")
+            tree.outputs.new("NodeSocketGeometry", "Geometry")
+
+        group_input = Node(tree.nodes.new("NodeGroupInput"), tree)
+        group_output = Node(tree.nodes.new("NodeGroupOutput"), tree)
+        instancer = Node(tree.nodes.new("GeometryNodeInstanceOnPoints"), tree)
+        info = Node(tree.nodes.new("GeometryNodeObjectInfo"), tree)
+        info.Object.value = self.prototype
+
+        connect_node_sockets(tree, group_input.outputs["Geometry"], instancer.Points)
+        connect_node_sockets(tree, info.Geometry, instancer.Instance)
+        for attribute, socket in zip(self.attributes, (instancer.Rotation, instancer.Scale)):
+            reader = tree.nodes.new("GeometryNodeInputNamedAttribute")
+            reader.data_type = "FLOAT_VECTOR"
+            reader = Node(reader, tree)
+            reader.Name.value = attribute
+            connect_node_sockets(tree, self._enabled_output(reader), socket)
+        connect_node_sockets(tree, instancer.Instances, group_output.inputs["Geometry"])
+
+        modifier = self._obj.modifiers.new(name, "NODES")
+        modifier.node_group = tree
+        self.node_tree = tree
+        return tree
+
+    def set_transforms(self, positions=None, rotations=None, scales=None):
+        # (N, 3) arrays written with one foreach_set each, rotations in degrees
+        mesh = self.mesh
+        if positions is not None:
+            mesh.vertices.foreach_set("co", np.asarray(positions, dtype=np.float32).ravel())
+        if rotations is not None:
+            rotations = np.deg2rad(np.asarray(rotations, dtype=float)).astype(np.float32)
+            mesh.attributes["rotation"].data.foreach_set("vector", rotations.ravel())
+        if scales is not None:
+            mesh.attributes["scale"].data.foreach_set("vector", np.asarray(scales, dtype=np.float32).ravel())
+        mesh.update()
+
+    def get_transforms(self):
+        n = len(self)
+        positions = np.empty(3 * n, dtype=np.float32)
+        self.mesh.vertices.foreach_get("co", positions)
+        rotations = np.empty(3 * n, dtype=np.float32)
+        self.mesh.attributes["rotation"].data.foreach_get("vector", rotations)
+        scales = np.empty(3 * n, dtype=np.float32)
+        self.mesh.attributes["scale"].data.foreach_get("vector", scales)
+        return positions.reshape(n, 3), np.rad2deg(rotations.reshape(n, 3)), scales.reshape(n, 3)
+
+    def elements(self, kind):
+        # the rna items keyed for each instance: vertices for positions, attribute data for rotation and scale
+        if kind not in self._elements:
+            if kind == "location":
+                self._elements[kind] = list(self.mesh.vertices)
+            else:
+                self._elements[kind] = list(self.mesh.attributes[kind].data)
+        return self._elements[kind]
+
+    def keyframe_transforms(self, tracker, positions=None, rotations=None, scales=None, frames=None,
+                            interpolation=None):
+        # (N, 3) or (F, N, 3) arrays keyed at frames (one per row from the current frame by default) through the
+        # tracker's bulk keyframe path, the last row becomes the current state
+        last = {}
+        for kind, prop, values in (("location", "co", positions), ("rotation", "vector", rotations),
+                                   ("scale", "vector", scales)):
+            if values is None:
+                continue
+            values = np.asarray(values, dtype=float)
+            if values.ndim == 2:
+                values = values[None]
+            last[kind] = values[-1]
+            if kind == "rotation":
+                values = np.deg2rad(values)
+            key_frames = tracker.current_frame + np.arange(len(values)) if frames is None else frames
+            tracker.insert_keyframes(self.elements(kind), prop, key_frames, values, interpolation=interpolation)
+        self.set_transforms(last.get("location"), last.get("rotation"), last.get("scale"))
+
+
 @blender_function(dependencies=[create_plain_object])
 def create_text(text="lorem", name="font object", x=0, y=0, z=0, size=1):
     font_curve = bpy.data.curves.new(type="FONT", name="Font Curve")
@@ -22,3 +22,6 @@ class Wave(Modifier):
 
 class Build(Modifier):
     tag = "BUILD"
+
+class MeshCache(Modifier):
+    tag = 'MESH_CACHE'
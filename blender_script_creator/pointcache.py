@@ -0,0 +1,83 @@
+import os
+import struct
+
+from blender_script_creator import LazyModule
+
+np = LazyModule("numpy")
+
+# 12 byte signature, version, number of points, start frame, sample rate, number of samples
+PC2_HEADER = struct.Struct("<12siiffi")
+PC2_SIGNATURE = b"POINTCACHE2\0"
+
+
+class PC2Writer():
+    # streams (frames, verts, 3) arrays into a .pc2 point cache: every append grows the file and writes the new
+    # samples through a memory map of just that region, so long caches never have to fit into memory at once
+    def __init__(self, path, n_points, start=0, sample_rate=1, append=False):
+        self.path = os.path.abspath(path)
+        self.n_points = int(n_points)
+        self.start = start
+        self.sample_rate = sample_rate
+        self.samples = 0
+        if append and os.path.exists(self.path):
+            header = read_pc2_header(self.path)
+            if header["points"] != self.n_points:
+                raise ValueError("{} holds {} points, not {}".format(self.path, header["points"], self.n_points))
+            self.start, self.sample_rate, self.samples = header["start"], header["sample_rate"], header["samples"]
+        else:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "wb") as f:
+                f.write(self._header())
+
+    def _header(self):
+        return PC2_HEADER.pack(PC2_SIGNATURE, 1, self.n_points, self.start, self.sample_rate, self.samples)
+
+    @property
+    def sample_bytes(self):
+        return self.n_points * 3 * 4
+
+    def append(self, positions):
+        positions = np.asarray(positions, dtype="<f4")
+        if positions.ndim == 2:
+            positions = positions[None]
+        if positions.shape[1:] != (self.n_points, 3):
+            raise ValueError("expected samples of shape ({}, 3), got {}".format(self.n_points, positions.shape[1:]))
+        n = len(positions)
+        if n == 0:
+            return self.samples
+        offset = PC2_HEADER.size + self.samples * self.sample_bytes
+        with open(self.path, "r+b") as f:
+            f.truncate(offset + n * self.sample_bytes)
+        region = np.memmap(self.path, dtype="<f4", mode="r+", offset=offset, shape=positions.shape)
+        region[:] = positions
+        region.flush()
+        del region
+
+        self.samples += n
+        with open(self.path, "r+b") as f:
+            f.write(self._header())
+        return self.samples
+
+
+def read_pc2_header(path):
+    with open(path, "rb") as f:
+        signature, version, points, start, sample_rate, samples = PC2_HEADER.unpack(f.read(PC2_HEADER.size))
+    if signature != PC2_SIGNATURE:
+        raise ValueError("{} is not a pc2 point cache".format(path))
+    return {"version": version, "points": points, "start": start, "sample_rate": sample_rate, "samples": samples}
+
+
+def read_pc2(path, mmap_mode="r"):
+    header = read_pc2_header(path)
+    shape = (header["samples"], header["points"], 3)
+    if header["samples"] == 0:
+        return header, np.empty(shape, dtype="<f4")
+    return header, np.memmap(path, dtype="<f4", mode=mmap_mode, offset=PC2_HEADER.size, shape=shape)
+
+
+def write_pc2(path, positions, start=0, sample_rate=1, chunk=256):
+    positions = np.asarray(positions)
+    writer = PC2Writer(path, positions.shape[1], start=start, sample_rate=sample_rate)
+    for i in range(0, len(positions), chunk):
+        writer.append(positions[i:i + chunk])
+    return writer
@@ -0,0 +1,274 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from blender_script_creator import LazyModule
+from blender_script_creator.animation import BlenderAnimationTracker, FrameTimeline
+from blender_script_creator.script import blender_function
+
+np = LazyModule("numpy")
+
+# column layout of baked .npy files, a plain structured array so blender can memory map it
+BAKED_DTYPE = [("target", "<i4"), ("data_path", "<i4"), ("index", "<i4"), ("frame", "<f8"), ("value", "<f8"),
+               ("interpolation", "<i4")]
+
+
+def interpolation_code(interpolation):
+    if interpolation is None:
+        interpolation = "BEZIER"
+    return BlenderAnimationTracker.interpolations.index(interpolation)
+
+
+class KeyframeRecorder(FrameTimeline):
+    # host side stand-in for BlenderAnimationTracker: objects are referenced by name and every keyframe is
+    # recorded into columns that apply_baked_keyframes writes into f-curves inside blender
+    def __init__(self, fps=24):
+        super().__init__(fps)
+        self._targets = {}
+        self._data_paths = {}
+        self._last_values = {}
+        self._columns = {"target": [], "data_path": [], "index": [], "frame": [], "value": [], "interpolation": []}
+
+    def _id(self, table, key):
+        if key not in table:
+            table[key] = len(table)
+        return table[key]
+
+    def _add(self, target, data_path, index, frame, value, interpolation):
+        self._columns["target"].append(target)
+        self._columns["data_path"].append(data_path)
+        self._columns["index"].append(index)
+        self._columns["frame"].append(float(frame))
+        self._columns["value"].append(float(value))
+        self._columns["interpolation"].append(interpolation)
+
+    def last_value(self, target, data_path, kind="object"):
+        target = (kind, getattr(target, "name", target))
+        values = []
+        index = 0
+        while (target, data_path, index) in self._last_values:
+            values.append(self._last_values[(target, data_path, index)])
+            index += 1
+        return np.array(values)
+
+    def set_initial(self, target, data_path, value, kind="object"):
+        # the value target has in the scene before any keyframe, without keying it. the recorder cannot read
+        # blender, so timed and delta changes need this (or an earlier keyframe) as their start value
+        target = (kind, getattr(target, "name", target))
+        for index, v in enumerate(np.atleast_1d(np.asarray(value, dtype=float))):
+            self._last_values[(target, data_path, index)] = float(v)
+
+    def _start_values(self, target, data_path, size):
+        values = [self._last_values.get((target, data_path, index)) for index in range(size)]
+        if None in values:
+            raise ValueError("no start value for {} of {} {!r}, key it first or use set_initial".format(
+                data_path, target[0], target[1]))
+        return values
+
+    def keyframe(self, target, data_path, value, time=0, reverse=False, interpolation=None, kind="object"):
+        # same semantics as BlenderAnimationTracker._animate: the previous value is keyed at the current frame and
+        # the new one after time seconds
+        target = (kind, getattr(target, "name", target))
+        t = self._id(self._targets, target)
+        p = self._id(self._data_paths, data_path)
+        code = interpolation_code(interpolation)
+        values = np.atleast_1d(np.asarray(value, dtype=float))
+        frames = self.seconds_to_frames(time)
+        if frames is None:
+            frames = 1
+
+        start = self.current_frame
+        if frames:
+            for index, previous in enumerate(self._start_values(target, data_path, len(values))):
+                self._add(t, p, index, start, previous, code)
+            self.run_frames(frames)
+        for index, v in enumerate(values):
+            self._add(t, p, index, self.current_frame, v, code)
+            self._last_values[(target, data_path, index)] = float(v)
+        if reverse:
+            self.go_to_frame(start)
+
+    def insert_keyframe_rows(self, objs, data_path, rows, frames, values, interpolation=None, kind="object"):
+        # same layout as BlenderAnimationTracker.insert_keyframe_rows: objs[rows[i]] gets values[i] at frames[i]
+        rows = np.asarray(rows, dtype=int)
+        frames = np.asarray(frames, dtype=float)
+        values = np.asarray(values, dtype=float).reshape(len(rows), -1)
+        if len(rows) == 0:
+            return
+        targets = [(kind, getattr(obj, "name", obj)) for obj in objs]
+        ids = np.array([self._id(self._targets, target) for target in targets])
+        p = self._id(self._data_paths, data_path)
+        code = interpolation_code(interpolation)
+        for index in range(values.shape[1]):
+            self._columns["target"].extend(ids[rows].tolist())
+            self._columns["data_path"].extend([p] * len(rows))
+            self._columns["index"].extend([index] * len(rows))
+            self._columns["frame"].extend(frames.tolist())
+            self._columns["value"].extend(values[:, index].tolist())
+            self._columns["interpolation"].extend([code] * len(rows))
+
+        order = np.lexsort((frames, rows))
+        last = order[np.r_[rows[order][1:] != rows[order][:-1], True]]
+        for row in last:
+            for index, v in enumerate(values[row]):
+                self._last_values[(targets[rows[row]], data_path, index)] = float(v)
+        self._max_frame = max(self._max_frame, float(frames.max()))
+
+    def _transform(self, obj, data_path, vec, delta, time, reverse, interpolation):
+        curr = self.last_value(obj, data_path)
+        if len(curr) != 3:
+            if delta:
+                self._start_values(("object", getattr(obj, "name", obj)), data_path, 3)
+            curr = np.zeros(3)
+        if delta:
+            vec = curr * vec if data_path == "scale" else curr + vec
+        self.keyframe(obj, data_path, vec, time=time, reverse=reverse, interpolation=interpolation)
+        return vec - curr
+
+    def move_object(self, obj, x=0, y=0, z=0, delta=False, time=0, reverse=False, interpolation=None):
+        return self._transform(obj, "location", np.array([x, y, z], dtype=float), delta, time, reverse,
+                               interpolation)
+
+    def rotate_object(self, obj, x=0, y=0, z=0, delta=False, time=0, reverse=False, interpolation=None):
+        vec = np.array([x, y, z], dtype=float) * 2 * np.pi / 360
+        return self._transform(obj, "rotation_euler", vec, delta, time, reverse, interpolation) * 360 / (2 * np.pi)
+
+    def scale_object(self, obj, x=0, y=0, z=0, delta=False, time=0, reverse=False, interpolation=None):
+        return self._transform(obj, "scale", np.array([x, y, z], dtype=float), delta, time, reverse,
+                               interpolation)
+
+    def change_node_value(self, material, node, socket_number, value, time=0, reverse=False, interpolation=None):
+        data_path = 'nodes["{}"].inputs[{}].default_value'.format(node, socket_number)
+        self.keyframe(material, data_path, value, time=time, reverse=reverse, interpolation=interpolation,
+                      kind="material")
+
+    def bake(self):
+        baked = {
+            "fps": self._fps,
+            "frame_end": float(self._max_frame),
+            "targets": [list(t) for t in self._targets],
+            "data_paths": list(self._data_paths),
+        }
+        baked.update(self._columns)
+        return baked
+
+
+def _bake(func, fps, kwargs):
+    recorder = KeyframeRecorder(fps=fps)
+    func(recorder, **kwargs)
+    return recorder.bake()
+
+
+def run_precompute(func, variants=None, fps=24, processes=1):
+    # func(recorder, **variant) runs on the host. with processes other than 1 (None for one per cpu) the variants
+    # are spread over a process pool, which pickles func: it has to be importable, and where workers are spawned
+    # (macos, windows, linux from python 3.14) they import the generating script again, so its module level code
+    # has to be guarded by if __name__ == "__main__"
+    if variants is None:
+        return _bake(func, fps, {})
+    variants = list(variants)
+    if len(variants) > 1 and processes != 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            return list(executor.map(_bake, [func] * len(variants), [fps] * len(variants), variants))
+    return [_bake(func, fps, v) for v in variants]
+
+
+_LIBRARY_DIGEST = None
+
+
+def _library_digest():
+    # the sources of this package, a bake records through KeyframeRecorder and may use any module of it
+    import hashlib
+    global _LIBRARY_DIGEST
+    if _LIBRARY_DIGEST is None:
+        h = hashlib.sha256()
+        package = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(package)):
+            if name.endswith(".py"):
+                with open(os.path.join(package, name), "rb") as f:
+                    h.update(name.encode("utf-8") + b"\0" + f.read())
+        _LIBRARY_DIGEST = h.hexdigest()
+    return _LIBRARY_DIGEST
+
+
+def _hash_value(h, value):
+    # like hashing repr(value), but arrays are hashed by content since their repr elides large arrays
+    if isinstance(value, dict):
+        h.update(b"{")
+        for k in sorted(value, key=repr):
+            _hash_value(h, k)
+            _hash_value(h, value[k])
+        h.update(b"}")
+    elif isinstance(value, (list, tuple)):
+        h.update(b"[" if isinstance(value, list) else b"(")
+        for v in value:
+            _hash_value(h, v)
+        h.update(b"]" if isinstance(value, list) else b")")
+    elif hasattr(value, "dtype") and hasattr(value, "tobytes"):
+        value = np.ascontiguousarray(value)
+        h.update(repr((value.dtype.str, value.shape)).encode("utf-8"))
+        h.update(value.tobytes())
+    else:
+        h.update(repr(value).encode("utf-8"))
+    h.update(b",")
+
+
+def precompute_key(func, variant=None, fps=24):
+    # changes whenever the scene function's source, the library, the variant or the frame rate change
+    import hashlib
+    import inspect
+    h = hashlib.sha256(inspect.getsource(func).encode("utf-8"))
+    h.update(_library_digest().encode("utf-8"))
+    _hash_value(h, (func.__module__, func.__qualname__, variant or {}, fps))
+    return h.hexdigest()[:20]
+
+
+def save_baked(baked, path):
+    # path without extension: the columns go to path.npy, fps, frame end and the name tables to path.json
+    import json
+    columns = np.empty(len(baked["frame"]), dtype=BAKED_DTYPE)
+    for name, dtype in BAKED_DTYPE:
+        columns[name] = baked[name]
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.save(path + ".npy", columns)
+    with open(path + ".json", "w") as f:
+        json.dump({k: v for k, v in baked.items() if k not in columns.dtype.names}, f)
+
+
+@blender_function(dependencies=[])
+def load_baked(path, mmap_mode="r"):
+    import json
+    with open(path + ".json", "r") as f:
+        baked = json.load(f)
+    columns = np.load(path + ".npy", mmap_mode=mmap_mode)
+    for name in columns.dtype.names:
+        baked[name] = columns[name]
+    return baked
+
+
+class BakedFile():
+    # stands for a baked cache file in the generated script, where it is loaded instead of embedded
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+
+    def load(self, mmap_mode="r"):
+        return load_baked.func(self.path, mmap_mode=mmap_mode)
+
+    def exists(self):
+        return os.path.exists(self.path + ".npy") and os.path.exists(self.path + ".json")
+
+    def __repr__(self):
+        return "load_baked({!r})".format(self.path)
+
+
+def precompute_files(func, variants=None, fps=24, processes=1, cache_dir=".", name="baked"):
+    # like run_precompute, but every variant is baked to cache_dir once and only rerun when its key changes
+    single = variants is None
+    variants = [{}] if single else list(variants)
+    files = [BakedFile(os.path.join(cache_dir, "{}_{}".format(name, precompute_key(func, v, fps))))
+             for v in variants]
+    missing = [i for i, f in enumerate(files) if not f.exists()]
+    if missing:
+        baked = run_precompute(func, variants=[variants[i] for i in missing], fps=fps, processes=processes)
+        for i, b in zip(missing, baked):
+            save_baked(b, files[i].path)
+    return files[0] if single else files
@@ -0,0 +1,247 @@
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+READ = "read"
+WRITE = "write"
+CALL = "call"
+OPERATOR = "operator"
+KEYFRAME = "keyframe"
+
+DEFAULT_VALUES = {
+    "location": (0., 0., 0.),
+    "rotation_euler": (0., 0., 0.),
+    "scale": (1., 1., 1.),
+    "users": 1,
+    "version": (4, 2, 0),
+}
+
+
+class Trace():
+    # counts every rna operation per (kind, path), item keys are collapsed to [] so traces of scenes with
+    # different object names stay comparable; the host time spent before an operation is attributed to it
+    def __init__(self, record_events=False):
+        self.counts = Counter()
+        self.times = Counter()
+        self.events = [] if record_events else None
+        self.error = None
+        self.duration = 0.
+        self._start = time.perf_counter()
+        self._last = self._start
+
+    def record(self, kind, path):
+        now = time.perf_counter()
+        key = (kind, path)
+        self.counts[key] += 1
+        self.times[key] += now - self._last
+        self._last = now
+        if self.events is not None:
+            self.events.append((now - self._start, kind, path))
+
+    def totals(self):
+        totals = Counter()
+        for (kind, path), n in self.counts.items():
+            totals[kind] += n
+        return totals
+
+    def most_common(self, n=None, kind=None):
+        return [(k, c) for k, c in self.counts.most_common() if kind is None or k[0] == kind][:n]
+
+    def diff(self, other):
+        return TraceDiff(self, other)
+
+    def report(self, n=20):
+        lines = ["{:>10} {:>9} {}".format("count", "ms", "operation")]
+        for (kind, path), c in self.most_common(n):
+            lines.append("{:>10} {:>9.3f} {} {}".format(c, self.times[(kind, path)] * 1000, kind, path))
+        lines.append("totals: " + ", ".join("{} {}".format(k, v) for k, v in sorted(self.totals().items())))
+        lines.append("duration: {:.3f} s".format(self.duration))
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.report()
+
+
+class TraceDiff():
+    def __init__(self, before, after):
+        self.before = before
+        self.after = after
+        keys = set(before.counts) | set(after.counts)
+        self.entries = sorted(((k, before.counts.get(k, 0), after.counts.get(k, 0)) for k in keys),
+                              key=lambda e: (-abs(e[2] - e[1]), e[0]))
+
+    def changed(self):
+        return [e for e in self.entries if e[1] != e[2]]
+
+    def regressions(self, factor=2., min_count=1):
+        return [e for e in self.entries if e[2] >= min_count and e[2] >= factor * e[1] and e[2] > e[1]]
+
+    def totals(self):
+        before = self.before.totals()
+        after = self.after.totals()
+        return {kind: (before.get(kind, 0), after.get(kind, 0)) for kind in set(before) | set(after)}
+
+    def __bool__(self):
+        return bool(self.changed())
+
+    def __str__(self):
+        lines = ["{:>10} {:>10} {:>10} {}".format("before", "after", "delta", "operation")]
+        for (kind, path), b, a in self.changed():
+            lines.append("{:>10} {:>10} {:>+10} {} {}".format(b, a, a - b, kind, path))
+        return "\n".join(lines)
+
+
+class RecordingProxy():
+    __slots__ = ("_trace", "_path", "_attrs", "_items", "_defaults")
+
+    def __init__(self, trace, path, defaults=None):
+        object.__setattr__(self, "_trace", trace)
+        object.__setattr__(self, "_path", path)
+        object.__setattr__(self, "_attrs", {})
+        object.__setattr__(self, "_items", {})
+        object.__setattr__(self, "_defaults", DEFAULT_VALUES if defaults is None else defaults)
+
+    def _child(self, path):
+        return RecordingProxy(self._trace, path, self._defaults)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        path = self._path + "." + name
+        self._trace.record(READ, path)
+        attrs = self._attrs
+        if name not in attrs:
+            attrs[name] = self._defaults[name] if name in self._defaults else self._child(path)
+        return attrs[name]
+
+    def __setattr__(self, name, value):
+        self._trace.record(WRITE, self._path + "." + name)
+        self._attrs[name] = value
+
+    def __call__(self, *args, **kwargs):
+        path = self._path + "()"
+        if path.startswith("bpy.ops."):
+            kind = OPERATOR
+        elif self._path.endswith(".keyframe_insert") or self._path.endswith(".keyframe_points.insert"):
+            kind = KEYFRAME
+        else:
+            kind = CALL
+        self._trace.record(kind, path)
+        result = self._child(path)
+        if self._path.endswith(".new") and args and isinstance(args[0], str):
+            result._attrs["name"] = args[0]
+        elif "name" in kwargs:
+            result._attrs["name"] = kwargs["name"]
+        return result
+
+    def __getitem__(self, key):
+        path = self._path + "[]"
+        self._trace.record(READ, path)
+        items = self._items
+        try:
+            if key not in items:
+                items[key] = self._child(path)
+            return items[key]
+        except TypeError:
+            return self._child(path)
+
+    def __setitem__(self, key, value):
+        self._trace.record(WRITE, self._path + "[]")
+        try:
+            self._items[key] = value
+        except TypeError:
+            pass
+
+    def __contains__(self, key):
+        try:
+            return key in self._items
+        except TypeError:
+            return False
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __bool__(self):
+        return True
+
+    def __float__(self):
+        return 0.
+
+    def __int__(self):
+        return 0
+
+    def __index__(self):
+        return 0
+
+    # recorded values compare like the neutral values above: equal only to themselves, never ordered
+    def __eq__(self, other):
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
+
+    def __hash__(self):
+        return id(self)
+
+    def __lt__(self, other):
+        return False
+
+    __le__ = __gt__ = __ge__ = __lt__
+
+    def __repr__(self):
+        return "<recorded {}>".format(self._path)
+
+
+def _binary_operation(name):
+    def operation(self, other):
+        return self._child("({} {})".format(self._path, name))
+    return operation
+
+
+for _name in ("add", "sub", "mul", "truediv", "floordiv", "mod", "pow", "matmul"):
+    setattr(RecordingProxy, "__{}__".format(_name), _binary_operation(_name))
+    setattr(RecordingProxy, "__r{}__".format(_name), _binary_operation(_name))
+
+
+@contextmanager
+def recording_modules(trace, defaults=None):
+    # temporarily replaces bpy and bmesh in sys.modules so `import bpy` in generated code gets the recorder
+    names = ("bpy", "bmesh")
+    previous = {name: sys.modules.get(name) for name in names}
+    for name in names:
+        sys.modules[name] = RecordingProxy(trace, name, defaults)
+    try:
+        yield
+    finally:
+        for name, module in previous.items():
+            if module is None:
+                del sys.modules[name]
+            else:
+                sys.modules[name] = module
+
+
+def run_script(source, trace=None, defaults=None, strict=True, filename="<generated script>"):
+    if trace is None:
+        trace = Trace()
+    code = compile(source, filename, "exec")
+    with recording_modules(trace, defaults):
+        start = trace._last = time.perf_counter()
+        try:
+            exec(code, {"__name__": "__main__", "__file__": filename})
+        except Exception as e:
+            if strict:
+                raise
+            trace.error = e
+        finally:
+            trace.duration = time.perf_counter() - start
+    return trace
+
+
+def run_file(filename, trace=None, defaults=None, strict=True):
+    with open(filename, "r") as f:
+        source = f.read()
+    return run_script(source, trace=trace, defaults=defaults, strict=strict, filename=filename)
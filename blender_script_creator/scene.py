@@ -1,17 +1,19 @@
-from blender_script_creator import bpy
-from blender_script_creator.geometry import BlenderObject, create_plain_object
+from blender_script_creator import bpy, LazyModule
+from blender_script_creator.geometry import BlenderObject, ObjectIndex, create_plain_object
 from blender_script_creator.materials import Material
 from blender_script_creator.script import blender_function, blender_basic_script
-import numpy as np
 
-@blender_function(dependencies=[BlenderObject,Material])
+np = LazyModule("numpy")
+
+@blender_function(dependencies=[BlenderObject,Material,ObjectIndex])
 def delete_all_but(l=[]):
     def flatten(ll):
-        if isinstance(ll,(list,tuple,np.ndarray)):
-            ll=list(ll)
-        else:
+        if not isinstance(ll,(list,tuple,np.ndarray)):
             return [ll]
-        return flatten(ll[0]) + (flatten(ll[1:]) if len(ll) > 1 else [])
+        flat = []
+        for i in ll:
+            flat.extend(flatten(i))
+        return flat
     l = list(flatten(l))
 
     obj_list = []
@@ -42,6 +44,7 @@ def delete_all_but(l=[]):
         if obj not in obj_list:
             obj.select_set(True)
     bpy.ops.object.delete()
+    ObjectIndex.reset()
 
     for material in bpy.data.materials:
         if material not in obj_list:
@@ -1,4 +1,6 @@
-import inspect
+import ast
+import io
+from blender_script_creator.source import source_cache, getsource_stripped, function_body, referenced_names, tree_shake
 
 class BlenderFunction():
     def __init__(self, func, dependencies=None):
@@ -17,11 +19,7 @@ class BlenderFunction():
         except:
             pass
     def to_code(self):
-        m = inspect.getsource(self.func)
-        while m.replace(" ","").startswith("@"):
-            m = m.split("\n",maxsplit=1)[1]
-
-        return m
+        return source_cache.get(self.func, "code", getsource_stripped)
 
     @property
     def __name__(self):
@@ -32,9 +30,7 @@ class _BlenderClass():
 
     @classmethod
     def to_code(cls):
-        m = inspect.getsource(cls)
-        while m.replace(" ","").startswith("@"):
-            m = m.split("\n",maxsplit=1)[1]
+        m = source_cache.get(cls, "code", getsource_stripped)
         m = m.replace("_BlenderClass","")
         return m
 
@@ -44,13 +40,85 @@ class _BlenderClass():
 class BlenderClass(_BlenderClass):
     dependencies=[]
 
+def _is_array(value):
+    return hasattr(value, "dtype") and getattr(value, "ndim", 0) > 0
+
+
+def iter_value_code(value, chunk=1024, top=True):
+    # the code of value in pieces: lists, tuples, dicts and numpy arrays are streamed element by element with runs
+    # of plain elements joined into chunks, so large embedded data is never built as one string
+    if isinstance(value, dict):
+        yield "{"
+        for i, (k, v) in enumerate(value.items()):
+            yield "{}{}: ".format(", " if i else "", repr(k))
+            yield from iter_value_code(v, chunk, top=False)
+        yield "}"
+    elif isinstance(value, (list, tuple)):
+        yield "[" if isinstance(value, list) else "("
+        buffer = []
+        for i, v in enumerate(value):
+            if i:
+                buffer.append(", ")
+            if isinstance(v, (dict, list, tuple)) or _is_array(v):
+                yield "".join(buffer)
+                buffer = []
+                yield from iter_value_code(v, chunk, top=False)
+            else:
+                buffer.append(repr(v))
+                # elements and their separators
+                if len(buffer) >= 2 * chunk:
+                    yield "".join(buffer)
+                    buffer = []
+        if isinstance(value, tuple) and len(value) == 1:
+            buffer.append(",")
+        buffer.append("]" if isinstance(value, list) else ")")
+        yield "".join(buffer)
+    elif _is_array(value):
+        dtype = value.dtype.descr if value.dtype.names else value.dtype.str
+        yield "np.array(["
+        for i in range(0, len(value), chunk):
+            yield (", " if i else "") + ", ".join(repr(row) for row in value[i:i + chunk].tolist())
+        yield "], dtype={!r})".format(dtype)
+        if value.ndim != 1:
+            yield ".reshape({!r})".format(value.shape)
+    else:
+        yield str(value) if top else repr(value)
+
+
 class BlenderVariable():
     def __init__(self,name,value):
         self.value = value
         self.name = name
 
     def to_code(self):
-        return "{} = {}".format(self.name,self.value)
+        return "".join(self.iter_code())
+
+    def iter_code(self):
+        yield "{} = ".format(self.name)
+        yield from iter_value_code(self.value)
+
+    def referenced_names(self):
+        # like referenced_names on the parsed code, without building it: plain data adds nothing but
+        # identifier-like strings, other objects add the names in their code
+        names = set()
+        stack = [(self.value, True)]
+        while stack:
+            value, top = stack.pop()
+            if isinstance(value, dict):
+                stack.extend((v, False) for v in value.keys())
+                stack.extend((v, False) for v in value.values())
+            elif isinstance(value, (list, tuple)):
+                stack.extend((v, False) for v in value)
+            elif isinstance(value, str):
+                if top:
+                    names |= referenced_names(ast.parse(value, mode="eval"))
+                elif value.isidentifier():
+                    names.add(value)
+            elif isinstance(value, (bool, int, float, complex, bytes, type(None))) or _is_array(value):
+                continue
+            else:
+                names |= referenced_names(ast.parse(str(value) if top else repr(value), mode="eval"))
+        return names
 
 def blender_function(dependencies=None):
     if dependencies is None:
@@ -66,18 +134,97 @@ def blender_basic_script(func):
 
 
 
-class BlenderScript():
+class DependencyCycleError(ValueError):
+    pass
+
+
+class DependencyGraph():
+    # functions and classes in emission order: every node comes after its dependencies and blender superclasses
     def __init__(self):
-        self._blender_variables = []
+        self._nodes = {}
+        self._variables = {}
+
+    def __contains__(self, node):
+        return node in self._nodes
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    @property
+    def variables(self):
+        return list(self._variables)
+
+    def add_variable(self, var):
+        # a later variable of the same name replaces the earlier one, which it would overwrite in the script
+        for v in list(self._variables):
+            if v.name == var.name and v is not var:
+                del self._variables[v]
+        self._variables[var] = None
+
+    @staticmethod
+    def _is_blender_class(node):
+        return isinstance(node, type) and issubclass(node, BlenderClass)
+
+    def _children(self, node):
+        children = []
+        for d in node.dependencies:
+            if self._is_blender_class(d) or isinstance(d, BlenderFunction):
+                children.append(d)
+            elif isinstance(d, BlenderVariable):
+                self.add_variable(d)
+            else:
+                raise ValueError("invalid dependency {!r} of type {} in {}".format(d, type(d), _node_name(node)))
+        if self._is_blender_class(node):
+            for superclass in reversed(node.mro()):
+                if superclass is not node and issubclass(superclass, BlenderClass):
+                    children.append(superclass)
+        return children
+
+    def add(self, node, include_self=True):
+        if node in self._nodes:
+            return
+        # iterative depth first search, a node is emitted once all of its children are
+        path = [node]
+        on_path = {node}
+        stack = [iter(self._children(node))]
+        while stack:
+            for child in stack[-1]:
+                if child in self._nodes:
+                    continue
+                if child in on_path:
+                    cycle = path[path.index(child):] + [child]
+                    raise DependencyCycleError(
+                        "circular dependency: {}".format(" -> ".join(_node_name(n) for n in cycle)))
+                path.append(child)
+                on_path.add(child)
+                stack.append(iter(self._children(child)))
+                break
+            else:
+                stack.pop()
+                done = path.pop()
+                on_path.discard(done)
+                if path or include_self:
+                    self._nodes[done] = None
+
+
+def _node_name(node):
+    return getattr(node, "__qualname__", None) or getattr(node, "__name__", repr(node))
+
+
+class BlenderScript():
+    def __init__(self, tree_shake=False):
+        self.tree_shake = tree_shake
+        self.shake_report = None
         self._needed_objects = []
-        self._blender_functions = []
+        self._dependencies = DependencyGraph()
         self._blender_operations = []
         self._imports = []
         self.import_module("bpy")
         self.import_module("bmesh")
         self.import_module("numpy",as_name="np")
-        from blender_script_creator.geometry import get_or_create_object
-        self.register_blender_function(get_or_create_object)
 
     def import_module(self, module_name, from_pack=None, as_name=None):
         self._imports.append(
@@ -90,94 +237,92 @@ class BlenderScript():
     def main():
         print("hello world")
 
-    def to_script(self):
-        s=""
-        for ip in self._imports:
-           s+=ip+"\n"
-        s+="\n"
+    def iter_chunks(self):
+        from blender_script_creator.geometry import get_or_create_object
+        self.register_blender_function(get_or_create_object)
 
         m=self.main
         if isinstance(m,(BlenderFunction,BlenderClass)):
             self.register_blender_dependencies(m)
             m=m.func
 
-        for f  in self._blender_functions:
-            if isinstance(f,BlenderClass):
-                s+=f.to_code(f)+"\n"
-            else:
-                s+=f.to_code()+"\n"
+        for ip in self._imports:
+            yield ip+"\n"
+        yield "\n"
+
+        # without tree shaking every dependency's code is only built when it is written
+        codes = (f.to_code() for f in self._dependencies)
+        main_body = source_cache.get(m, "body", function_body)
+        if self.tree_shake:
+            root_names = referenced_names(ast.parse(main_body))
+            root_names.add("get_or_create_object")
+            root_names.update(obj[1].__name__ for obj in self._needed_objects)
+            for v in self._dependencies.variables:
+                root_names |= v.referenced_names()
+            codes, self.shake_report = tree_shake(list(codes), root_names)
+        for code in codes:
+            yield code+"\n"
+
+        for v in self._dependencies.variables:
+            yield from v.iter_code()
+            yield "\n"
+
+        yield "#OBJETCS\n"
+        for obj in self._needed_objects:
+            yield "{}=get_or_create_object('{}',{},{})\n".format(obj[0],obj[0],obj[1].__name__,",".join("{}={}".format(k,v) for k,v in obj[2].items()))
 
-        for v in self._blender_variables:
-            s+=v.to_code()+"\n"
+        yield main_body+"\n"
 
-        s+="#OBJETCS\n"
-        for obj in self._needed_objects:
-            s+="{}=get_or_create_object('{}',{},{})\n".format(obj[0],obj[0],obj[1].__name__,",".join("{}={}".format(k,v) for k,v in obj[2].items()))
-
-        m  = inspect.getsource(m)
-
-        m = m.replace("\t","    ")
-        #print(m)
-        while not m.replace(" ","").startswith("def"):
-            m = m.split("\n",maxsplit=1)[1]
-        m = m.split("\n",maxsplit=1)[1]
-        #print(m)
-        indent=1000
-        for line in m.split("\n"):
-            i=0
-            if len(line.replace(" ",""))>0:
-                while line[0]==" " and i <= indent:
-                    line=line[1:]
-                    i+=1
-                indent=min(indent,i)
-
-        m_lines=[]
-        for line in m.split("\n"):
-            if len(line)>0:
-                m_lines.append(line[indent:])
-        m="\n".join(m_lines)
-
-        s+=m+"\n"
-
-        s+="print('DONE')"
-        return s
+        yield "print('DONE')"
+
+    def write(self, fp):
+        for chunk in self.iter_chunks():
+            fp.write(chunk)
+
+    def to_script(self):
+        s = io.StringIO()
+        self.write(s)
+        return s.getvalue()
 
     def __str__(self):
         return self.to_script()
 
     def register_blender_function(self, m:BlenderFunction):
-        if m in self._blender_functions:
-            return
-
-        self.register_blender_dependencies(m)
-        self._blender_functions.append(m)
+        self._dependencies.add(m)
 
     def register_blender_variable(self,var):
-        self._blender_variables.append(var)
+        self._dependencies.add_variable(var)
 
     def register_blender_class(self,cls:BlenderClass):
-        if cls in self._blender_functions:
-            return
-        self.register_blender_dependencies(cls)
-        for superclass in reversed(cls.mro()):
-            if superclass!=cls:
-                if issubclass(superclass,BlenderClass):
-                    self.register_blender_class(superclass)
-
-        self._blender_functions.append(cls)
-#        print(cls,cls.mro())
+        self._dependencies.add(cls)
 
     def register_blender_dependencies(self, m:(BlenderFunction,BlenderClass)):
-        for d in m.dependencies:
-            if type(d)==type(BlenderClass) and issubclass(d,BlenderClass):
-                self.register_blender_class(d)
-            elif isinstance(d,BlenderFunction):
-                self.register_blender_function(d)
-            elif isinstance(d,BlenderVariable):
-                self.register_blender_variable(d)
-            else:
-                print(type(d))
-                raise ValueError()
+        self._dependencies.add(m, include_self=False)
+
+    def precompute(self, func, name="BAKED", variants=None, fps=24, processes=1, cache_dir=None, variant=0):
+        # runs func(recorder, **variant) on the host and embeds the recorded keyframes as variable name,
+        # main applies them with apply_baked_keyframes(name). with a cache_dir the keyframes are stored as
+        # memory mappable files that the script loads, and unchanged scenes are not recomputed. with variants
+        # every variant is baked once and all results are returned, variants[variant] is embedded and
+        # embed_baked(results[i]) switches the script to another one, so writing a script per variant needs
+        # no second bake. see run_precompute for processes
+        from blender_script_creator.precompute import run_precompute, precompute_files
+        if cache_dir is None:
+            baked = run_precompute(func, variants=variants, fps=fps, processes=processes)
+        else:
+            baked = precompute_files(func, variants=variants, fps=fps, processes=processes, cache_dir=cache_dir,
+                                     name=name.lower())
+        self.embed_baked(baked if variants is None else baked[variant], name=name)
+        return baked
+
+    def embed_baked(self, baked, name="BAKED"):
+        # baked keyframes or a BakedFile as variable name, replacing an earlier variable of that name
+        from blender_script_creator.animation import apply_baked_keyframes
+        from blender_script_creator.precompute import BakedFile, load_baked
+        if isinstance(baked, BakedFile):
+            self.register_blender_function(load_baked)
+        self.register_blender_variable(BlenderVariable(name, baked))
+        self.register_blender_function(apply_baked_keyframes)
 
     def register_object(self,name,creator,**kwargs):
         self._needed_objects.append((name,creator,kwargs))
\ No newline at end of file
@@ -0,0 +1,176 @@
+from blender_script_creator import LazyModule
+from blender_script_creator.script import BlenderClass
+
+np = LazyModule("numpy")
+
+
+class BallSimulation(BlenderClass):
+    # elastic spheres in an axis aligned box. the broadphase hashes every ball into a uniform grid with cells at
+    # least one diameter wide, so colliding balls share a cell or are neighbours; sorting the cell keys once per
+    # step and looking up the own cell plus half of the 26 neighbours with searchsorted visits every candidate
+    # pair once, which keeps a step near linear in the number of balls
+    event_dtype = [("time", "f8"), ("body", "i8"), ("other", "i8"), ("axis", "i8")]
+
+    def __init__(self, positions, velocities, radii=0.5, box_min=0, box_max=1, masses=None, fps=24, substeps=4,
+                 cell_size=None):
+        self.positions = np.array(positions, dtype=float).reshape(-1, 3)
+        self.velocities = np.array(velocities, dtype=float).reshape(-1, 3)
+        n = len(self.positions)
+        self.radii = np.broadcast_to(np.asarray(radii, dtype=float), (n,)).copy()
+        self.masses = self.radii ** 3 if masses is None else np.broadcast_to(np.asarray(masses, dtype=float), (n,))
+        self.box_min = np.broadcast_to(np.asarray(box_min, dtype=float), (3,))
+        self.box_max = np.broadcast_to(np.asarray(box_max, dtype=float), (3,))
+        self.dt = 1. / (fps * substeps)
+        if cell_size is None:
+            cell_size = 2 * self.radii.max() if n else 1.
+        self.cell_size = cell_size
+        self.shape = np.maximum(np.ceil((self.box_max - self.box_min) / cell_size), 1).astype(int)
+        self.time = 0.
+        self.steps = 0
+        self.pair_checks = 0
+        self._events = []
+        # location keys: body, time and position at every velocity change, the motion between them is linear
+        self._keys = [(np.arange(n), np.zeros(n), self.positions.copy())]
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def events(self):
+        if not self._events:
+            return np.empty(0, dtype=self.event_dtype)
+        return np.concatenate(self._events)
+
+    def _record_events(self, times, body, other, axis):
+        events = np.empty(len(times), dtype=self.event_dtype)
+        events["time"] = times
+        events["body"] = body
+        events["other"] = other
+        events["axis"] = axis
+        self._events.append(events)
+
+    def _half_neighbourhood(self):
+        # the own cell and the 13 neighbours that come after it, every pair of adjacent cells is visited once
+        offsets = np.array(np.meshgrid([-1, 0, 1], [-1, 0, 1], [-1, 0, 1], indexing="ij")).reshape(3, -1).T
+        key = offsets[:, 2] * 9 + offsets[:, 1] * 3 + offsets[:, 0]
+        return offsets[key >= 0]
+
+    def candidate_pairs(self, positions=None):
+        if positions is None:
+            positions = self.positions
+        shape = self.shape
+        cells = np.clip(((positions - self.box_min) // self.cell_size).astype(int), 0, shape - 1)
+        keys = cells[:, 0] + shape[0] * (cells[:, 1] + shape[1] * cells[:, 2])
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+
+        first, second = [], []
+        for offset in self._half_neighbourhood():
+            neighbour = cells + offset
+            valid = np.all((neighbour >= 0) & (neighbour < shape), axis=1)
+            neighbour_keys = neighbour[:, 0] + shape[0] * (neighbour[:, 1] + shape[1] * neighbour[:, 2])
+            start = np.searchsorted(sorted_keys, neighbour_keys, side="left")
+            end = np.searchsorted(sorted_keys, neighbour_keys, side="right")
+            count = np.where(valid, end - start, 0)
+            i = np.repeat(np.arange(len(positions)), count)
+            j = order[np.repeat(start, count) + np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)]
+            if not offset.any():
+                keep = i < j
+                i, j = i[keep], j[keep]
+            first.append(i)
+            second.append(j)
+        return np.concatenate(first), np.concatenate(second)
+
+    def _walls(self, dt):
+        x, v = self.positions, self.velocities
+        low = self.box_min + self.radii[:, None]
+        high = self.box_max - self.radii[:, None]
+        moved = x + v * dt
+        below, above = moved < low, moved > high
+        hit = below | above
+        if hit.any():
+            body, axis = np.nonzero(hit)
+            wall = np.where(below[body, axis], low[body, axis], high[body, axis])
+            t_hit = (wall - x[body, axis]) / v[body, axis]
+            # a body can hit up to three walls in a step, in time order every hit reflects the later keys
+            order = np.lexsort((t_hit, body))
+            body, axis, wall, t_hit = body[order], axis[order], wall[order], t_hit[order]
+            keys = x[body] + v[body] * t_hit[:, None]
+            for d in (1, 2):
+                k = np.flatnonzero(body[d:] == body[:-d]) + d
+                keys[k, axis[k - d]] = 2 * wall[k - d] - keys[k, axis[k - d]]
+            self._record_events(self.time + t_hit, body, -1, axis)
+            self._keys.append((body, self.time + t_hit, keys))
+            moved = np.where(below, 2 * low - moved, moved)
+            moved = np.where(above, 2 * high - moved, moved)
+            self.velocities = np.where(hit, -v, v)
+        self.positions = moved
+
+    def _collide(self):
+        i, j = self.candidate_pairs()
+        self.pair_checks += len(i)
+        x = self.positions
+        d = x[j] - x[i]
+        distance = np.sqrt(np.einsum("ij,ij->i", d, d))
+        touching = (distance < self.radii[i] + self.radii[j]) & (distance > 0)
+        i, j = i[touching], j[touching]
+        normal = d[touching] / distance[touching][:, None]
+        velocities = self.velocities
+        resolved = []
+        # impulses on a body in several contacts are applied one pair at a time, every round resolves the pairs
+        # that are the first contact of both their bodies, so each impulse is an elastic two body collision
+        while len(i):
+            approaching = np.einsum("ij,ij->i", velocities[i] - velocities[j], normal) > 0
+            i, j, normal = i[approaching], j[approaching], normal[approaching]
+            if not len(i):
+                break
+            pair = np.arange(len(i))
+            first = np.full(len(self), len(i))
+            np.minimum.at(first, np.concatenate([i, j]), np.concatenate([pair, pair]))
+            now = (first[i] == pair) & (first[j] == pair)
+            a, b, n = i[now], j[now], normal[now]
+            closing = np.einsum("ij,ij->i", velocities[a] - velocities[b], n)
+            impulse = (2 * closing / (1 / self.masses[a] + 1 / self.masses[b]))[:, None] * n
+            velocities = velocities.copy()
+            velocities[a] -= impulse / self.masses[a][:, None]
+            velocities[b] += impulse / self.masses[b][:, None]
+            resolved.append((a, b))
+            i, j, normal = i[~now], j[~now], normal[~now]
+        if not resolved:
+            return
+        self.velocities = velocities
+        i = np.concatenate([r[0] for r in resolved])
+        j = np.concatenate([r[1] for r in resolved])
+        self._record_events(np.full(len(i), self.time), i, j, -1)
+        bodies = np.unique(np.concatenate([i, j]))
+        self._keys.append((bodies, np.full(len(bodies), self.time), x[bodies]))
+
+    def step(self):
+        self._walls(self.dt)
+        self.steps += 1
+        self.time = self.steps * self.dt
+        self._collide()
+
+    def run(self, duration):
+        for i in range(int(round(duration / self.dt))):
+            self.step()
+        n = len(self)
+        self._keys.append((np.arange(n), np.full(n, self.time), self.positions.copy()))
+        return self.events
+
+    def keyframes(self):
+        # (bodies, times, positions) of every location key, sorted per body and time
+        bodies = np.concatenate([k[0] for k in self._keys])
+        times = np.concatenate([k[1] for k in self._keys])
+        positions = np.concatenate([k[2] for k in self._keys])
+        order = np.lexsort((times, bodies))
+        return bodies[order], times[order], positions[order]
+
+    def animate(self, tracker, objs, start=None):
+        # bakes the simulated motion into LINEAR location keys on a BlenderAnimationTracker or KeyframeRecorder
+        if start is None:
+            start = tracker.current_frame
+        bodies, times, positions = self.keyframes()
+        tracker.insert_keyframe_rows(objs, "location", bodies, start + tracker.seconds_to_frames(times), positions,
+                                     interpolation="LINEAR")
+        return start + tracker.seconds_to_frames(self.time)
@@ -0,0 +1,349 @@
+import ast
+import inspect
+import io
+import os
+import tokenize
+from collections import OrderedDict
+from functools import lru_cache
+
+
+def default_cache_dir():
+    cache_dir = os.environ.get("BLENDER_SCRIPT_CREATOR_CACHE")
+    if cache_dir is not None:
+        return cache_dir
+    base = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "blender_script_creator")
+
+
+@lru_cache(maxsize=1)
+def extraction_version():
+    # a digest of this module, cached extractions are only valid for the code that produced them
+    import hashlib
+    with open(os.path.abspath(__file__), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+@lru_cache(maxsize=256)
+def parse_source(source):
+    # nested definitions are wrapped instead of dedented, so columns and string contents stay untouched
+    offset = 0
+    if source[:1].isspace():
+        source = "if 1:\n" + source
+        offset = 1
+    tree = ast.parse(source)
+    node = tree.body[0]
+    if offset:
+        node = node.body[0]
+    return source, tree, node
+
+
+def strip_decorators(source):
+    # the definition starts at its def or class line, decorators above it may span several lines
+    wrapped, tree, node = parse_source(source)
+    if not getattr(node, "decorator_list", None):
+        return source
+    offset = wrapped.count("\n") - source.count("\n")
+    return "\n".join(source.split("\n")[node.lineno - 1 - offset:])
+
+
+def getsource_stripped(obj):
+    return strip_decorators(inspect.getsource(obj))
+
+
+def _string_continuation_rows(source):
+    rows = set()
+    fstring_start = getattr(tokenize, "FSTRING_START", None)
+    fstring_end = getattr(tokenize, "FSTRING_END", None)
+    opened = []
+    for tok in tokenize.generate_tokens(io.StringIO(source).readline):
+        if tok.type == tokenize.STRING:
+            rows.update(range(tok.start[0] + 1, tok.end[0] + 1))
+        elif tok.type == fstring_start:
+            opened.append(tok.start[0])
+        elif tok.type == fstring_end and opened:
+            rows.update(range(opened.pop() + 1, tok.end[0] + 1))
+    return rows
+
+
+def _header_end(source, node):
+    for tok in tokenize.generate_tokens(io.StringIO(source).readline):
+        if tok.type == tokenize.NEWLINE and tok.start[0] >= node.lineno:
+            return tok.start[0]
+    return node.lineno
+
+
+def function_body(func):
+    source, tree, node = parse_source(inspect.getsource(func))
+    first = node.body[0]
+    header_end = _header_end(source, node)
+    if first.lineno == header_end:
+        return "\n".join(ast.get_source_segment(source, stmt) for stmt in node.body)
+
+    lines = source.splitlines()
+    prefix = lines[first.lineno - 1][:first.col_offset]
+    string_rows = _string_continuation_rows(source)
+    body = []
+    for row in range(header_end + 1, node.end_lineno + 1):
+        line = lines[row - 1]
+        if row in string_rows:
+            body.append(line)
+        elif line.startswith(prefix):
+            body.append(line[len(prefix):])
+        else:
+            body.append(line.lstrip())
+    return "\n".join(body)
+
+
+def referenced_names(node):
+    # every identifier a piece of code may reach: plain names, attribute names and identifier-like strings
+    # (for getattr/setattr), methods are kept by name so this errs on the side of keeping code
+    names = set()
+    for n in ast.walk(node):
+        if isinstance(n, ast.Name):
+            names.add(n.id)
+        elif isinstance(n, ast.Attribute):
+            names.add(n.attr)
+        elif isinstance(n, ast.Constant) and isinstance(n.value, str) and n.value.isidentifier():
+            names.add(n.value)
+    return names
+
+
+def _is_dunder(name):
+    return name.startswith("__") and name.endswith("__")
+
+
+def _is_dependencies_assignment(stmt):
+    return isinstance(stmt, ast.Assign) and any(
+        isinstance(t, ast.Name) and t.id == "dependencies" for t in stmt.targets)
+
+
+def _first_line(stmt):
+    return min([stmt.lineno] + [d.lineno for d in getattr(stmt, "decorator_list", [])])
+
+
+class ShakeReport():
+    def __init__(self):
+        self.removed_functions = []
+        self.removed_methods = []
+        self.lines_saved = 0
+        self.bytes_saved = 0
+
+    def _removed(self, code, kept=""):
+        self.lines_saved += code.count("\n") - kept.count("\n")
+        self.bytes_saved += len(code.encode("utf-8")) - len(kept.encode("utf-8"))
+
+    def __str__(self):
+        return "tree shaking removed {} functions and {} methods, saving {} lines ({} bytes)".format(
+            len(self.removed_functions), len(self.removed_methods), self.lines_saved, self.bytes_saved)
+
+
+def tree_shake(codes, root_names):
+    # codes are top-level function or class sources in emission order, root_names what the main body references
+    units = [parse_source(code) for code in codes]
+    names = set(root_names)
+    visited = set()
+    kept_methods = {}
+
+    changed = True
+    while changed:
+        changed = False
+        for i, (source, tree, node) in enumerate(units):
+            if node.name not in names:
+                continue
+            if i not in visited:
+                visited.add(i)
+                changed = True
+                if isinstance(node, ast.ClassDef):
+                    kept_methods[i] = set()
+                    for n in node.bases + node.keywords + node.decorator_list:
+                        names |= referenced_names(n)
+                    for stmt in node.body:
+                        if not isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)) \
+                                and not _is_dependencies_assignment(stmt):
+                            names |= referenced_names(stmt)
+                else:
+                    names |= referenced_names(node)
+            if isinstance(node, ast.ClassDef):
+                for j, stmt in enumerate(node.body):
+                    if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)) and j not in kept_methods[i] \
+                            and (_is_dunder(stmt.name) or stmt.name in names):
+                        kept_methods[i].add(j)
+                        names |= referenced_names(stmt)
+                        changed = True
+
+    report = ShakeReport()
+    shaken = []
+    for i, (source, tree, node) in enumerate(units):
+        code = codes[i]
+        if i not in visited:
+            report.removed_functions.append(node.name)
+            report._removed(code + "\n")
+            continue
+        if not isinstance(node, ast.ClassDef):
+            shaken.append(code)
+            continue
+
+        offset = 1 if source != code else 0
+        lines = code.split("\n")
+        drop = set()
+        kept_statements = 0
+        for j, stmt in enumerate(node.body):
+            if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                if j in kept_methods[i]:
+                    kept_statements += 1
+                    continue
+                report.removed_methods.append("{}.{}".format(node.name, stmt.name))
+            elif not _is_dependencies_assignment(stmt):
+                kept_statements += 1
+                continue
+            drop.update(range(_first_line(stmt) - offset, stmt.end_lineno - offset + 1))
+
+        new_lines = [line for row, line in enumerate(lines, 1) if row not in drop]
+        if not kept_statements:
+            first = node.body[0]
+            indent = source.split("\n")[first.lineno - 1][:first.col_offset]
+            new_lines.insert(_first_line(first) - offset - 1, indent + "pass")
+        kept = "\n".join(new_lines)
+        report._removed(code, kept)
+        shaken.append(kept)
+    return shaken, report
+
+
+class SourceCache():
+    # entries are keyed by (kind, file, mtime, size, qualname) and the extraction version, so editing a module or
+    # upgrading this library invalidates entries while unchanged code is served from memory or from the on-disk
+    # store. the store keeps the max_disk_entries most recently used entries
+    prune_interval = 64
+
+    def __init__(self, cache_dir=None, maxsize=512, max_disk_entries=4096):
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        self.cache_dir = cache_dir
+        self.maxsize = maxsize
+        self.max_disk_entries = max_disk_entries
+        self._stores = 0
+        self._memory = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, obj, kind="code"):
+        try:
+            filename = inspect.getsourcefile(obj)
+        except TypeError:
+            return None
+        if filename is None:
+            return None
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return None
+        code = getattr(obj, "__code__", None)
+        firstlineno = code.co_firstlineno if code is not None else getattr(obj, "__firstlineno__", 0)
+        return (kind, extraction_version(), os.path.abspath(filename), st.st_mtime_ns, st.st_size,
+                obj.__module__, obj.__qualname__, firstlineno)
+
+    def get(self, obj, kind, compute):
+        key = self.key(obj, kind)
+        if key is None:
+            self.misses += 1
+            return compute(obj)
+
+        if key in self._memory:
+            self.hits += 1
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        value = self._load(key)
+        if value is None:
+            self.misses += 1
+            value = compute(obj)
+            self._store(key, value)
+        else:
+            self.disk_hits += 1
+        self._remember(key, value)
+        return value
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        import hashlib
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".json")
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        import json
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("key") != list(key):
+            return None
+        try:
+            # the modification time marks recent use for prune
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return entry.get("value")
+
+    def _store(self, key, value):
+        if not self.cache_dir:
+            return
+        import json
+        import tempfile
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"key": list(key), "value": value}, f)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        self._stores += 1
+        if self._stores % self.prune_interval == 0:
+            self.prune()
+
+    def _disk_entries(self):
+        entries = []
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            for root, dirs, files in os.walk(self.cache_dir):
+                for fn in files:
+                    if fn.endswith(".json"):
+                        entries.append(os.path.join(root, fn))
+        return entries
+
+    def prune(self, max_entries=None):
+        # removes the least recently used entries beyond max_entries from the on-disk store
+        if max_entries is None:
+            max_entries = self.max_disk_entries
+        entries = []
+        for path in self._disk_entries():
+            try:
+                entries.append((os.stat(path).st_mtime_ns, path))
+            except OSError:
+                pass
+        entries.sort()
+        removed = 0
+        for mtime, path in entries[:max(len(entries) - max_entries, 0)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def clear(self, disk=False):
+        self._memory.clear()
+        if disk:
+            self.prune(0)
+
+
+source_cache = SourceCache()
@@ -0,0 +1,97 @@
+from blender_script_creator import LazyModule
+from blender_script_creator.script import BlenderClass
+
+np = LazyModule("numpy")
+
+
+class BoxBounce(BlenderClass):
+    # N bodies with constant velocities reflecting elastically at the walls of an axis aligned box. unfolded
+    # along an axis a body moves freely and hits a wall whenever it crosses a multiple of the box length, so
+    # every event time is solved in closed form and positions are exact at any time
+    event_dtype = [("time", "f8"), ("body", "i8"), ("axis", "i8"), ("wall", "i8")]
+
+    def __init__(self, positions, velocities, box_min=0, box_max=1, radius=0, duration=1):
+        self.positions = np.array(positions, dtype=float).reshape(-1, 3)
+        self.velocities = np.array(velocities, dtype=float).reshape(-1, 3)
+        self.radius = radius
+        self.low = np.broadcast_to(np.asarray(box_min, dtype=float), (3,)) + radius
+        self.high = np.broadcast_to(np.asarray(box_max, dtype=float), (3,)) - radius
+        if np.any(self.high <= self.low):
+            raise ValueError("the box is too small for bodies with radius {}".format(radius))
+        self.duration = duration
+        self.events = self._solve()
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def length(self):
+        return self.high - self.low
+
+    def _solve(self):
+        # events sorted by time with the body, the axis and the wall (0 low, 1 high) that was hit
+        length = self.length
+        u0 = (self.positions - self.low).ravel()
+        v = self.velocities.ravel()
+        L = np.tile(length, len(self))
+        u1 = u0 + v * self.duration
+
+        first = np.where(v > 0, np.floor(u0 / L) + 1, np.ceil(u0 / L) - 1)
+        last = np.where(v > 0, np.floor(u1 / L), np.ceil(u1 / L))
+        step = np.sign(v)
+        count = np.where(v != 0, (last - first) * step + 1, 0).clip(0).astype(int)
+
+        total = int(count.sum())
+        which = np.repeat(np.arange(len(v)), count)
+        offset = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+        k = first[which] + step[which] * offset
+
+        events = np.empty(total, dtype=self.event_dtype)
+        events["time"] = (k * L[which] - u0[which]) / v[which]
+        events["body"] = which // 3
+        events["axis"] = which % 3
+        events["wall"] = np.mod(k, 2).astype(int)
+        return events[np.argsort(events["time"], kind="stable")]
+
+    def positions_at(self, times, bodies=None):
+        # positions of bodies (all by default) at times, both broadcast against each other
+        if bodies is None:
+            bodies = np.arange(len(self))
+        times = np.asarray(times, dtype=float)
+        bodies = np.asarray(bodies, dtype=int)
+        length = self.length
+        u = self.positions[bodies] - self.low + self.velocities[bodies] * times[..., None]
+        m = np.mod(u, 2 * length)
+        return self.low + np.where(m <= length, m, 2 * length - m)
+
+    def velocities_at(self, times, bodies=None):
+        if bodies is None:
+            bodies = np.arange(len(self))
+        times = np.asarray(times, dtype=float)
+        bodies = np.asarray(bodies, dtype=int)
+        length = self.length
+        u = self.positions[bodies] - self.low + self.velocities[bodies] * times[..., None]
+        forward = np.mod(u, 2 * length) < length
+        return np.where(forward, 1, -1) * self.velocities[bodies]
+
+    def events_of(self, body):
+        return self.events[self.events["body"] == body]
+
+    def keyframe_times(self):
+        # (bodies, times): the start, every event and the end, one entry per body and distinct time
+        n = len(self)
+        bodies = np.concatenate([np.arange(n), self.events["body"], np.arange(n)])
+        times = np.concatenate([np.zeros(n), self.events["time"], np.full(n, float(self.duration))])
+        order = np.lexsort((times, bodies))
+        bodies, times = bodies[order], times[order]
+        distinct = np.r_[True, (bodies[1:] != bodies[:-1]) | (times[1:] != times[:-1])]
+        return bodies[distinct], times[distinct]
+
+    def animate(self, tracker, objs, start=None):
+        # one LINEAR location key per event at its exact (sub-)frame, returns the frame the motion ends on
+        if start is None:
+            start = tracker.current_frame
+        bodies, times = self.keyframe_times()
+        tracker.insert_keyframe_rows(objs, "location", bodies, start + tracker.seconds_to_frames(times),
+                                     self.positions_at(times, bodies), interpolation="LINEAR")
+        return start + tracker.seconds_to_frames(self.duration)
@@ -0,0 +1,95 @@
+import numpy as np
+
+from blender_script_creator.animation import BlenderAnimationTracker, KeyframeStore, remove_fcurve_points, \
+    write_fcurve_points
+
+FIELDS = {"co": (2, np.float32), "handle_left": (2, np.float32), "handle_right": (2, np.float32),
+          "interpolation": (1, np.int32), "handle_left_type": (1, np.int32), "handle_right_type": (1, np.int32)}
+
+
+class KeyframePoints():
+    # keyframe points stored like blender does, in float32, with bulk access and removal from the end
+    def __init__(self):
+        self.data = {name: np.zeros((0, width), dtype) for name, (width, dtype) in FIELDS.items()}
+        self.removes = 0
+
+    def __len__(self):
+        return len(self.data["co"])
+
+    def __getitem__(self, i):
+        return i % len(self)
+
+    def add(self, n):
+        for name, (width, dtype) in FIELDS.items():
+            self.data[name] = np.concatenate([self.data[name], np.zeros((n, width), dtype)])
+
+    def remove(self, i, fast=False):
+        self.removes += 1
+        for name in self.data:
+            self.data[name] = np.delete(self.data[name], i, axis=0)
+
+    def clear(self):
+        for name in self.data:
+            self.data[name] = self.data[name][:0]
+
+    def foreach_get(self, name, out):
+        out[:] = self.data[name].ravel()
+
+    def foreach_set(self, name, values):
+        self.data[name] = np.asarray(values).astype(FIELDS[name][1]).reshape(self.data[name].shape)
+
+
+class FCurve():
+    def __init__(self):
+        self.keyframe_points = KeyframePoints()
+
+    def update(self):
+        pass
+
+
+def test_write_fcurve_points_replaces_fractional_frames_and_keeps_handles():
+    fc = FCurve()
+    write_fcurve_points.func(fc, [1, 2.4, 3], [1, 2, 3], [2, 2, 2])
+    points = fc.keyframe_points.data
+    points["handle_left_type"][:] = 3
+    write_fcurve_points.func(fc, [2.4, 2.5], [7, 8], [1, 1])
+
+    np.testing.assert_allclose(points["co"], [[1, 1], [2.4, 7], [2.5, 8], [3, 3]], rtol=1e-6)
+    assert points["handle_left_type"].ravel().tolist() == [3, 3, 4, 3]
+    assert points["interpolation"].ravel().tolist() == [2, 1, 1, 2]
+
+
+def test_remove_fcurve_points():
+    fc = FCurve()
+    write_fcurve_points.func(fc, np.arange(1000), np.arange(1000) * 2., np.full(1000, 1))
+    assert remove_fcurve_points.func(fc, [(10, 20)]) == 10
+    assert remove_fcurve_points.func(fc, [(99, None)]) == 900
+    points = fc.keyframe_points
+    assert points.removes == 0
+    assert len(points) == 90
+    np.testing.assert_array_equal(points.data["co"][-1], [99, 198])
+    assert remove_fcurve_points.func(fc, [(95, None)]) == 4
+    assert len(points) == 86
+
+
+def test_interpolation_codes_follow_blender():
+    codes = BlenderAnimationTracker.interpolations
+    assert codes.index("CONSTANT") == 0 and codes.index("BEZIER") == 2
+    assert codes.index("BACK") == 3 and codes.index("SINE") == 12
+
+
+def test_simplify():
+    store = KeyframeStore()
+    frames = np.arange(10.)
+    store.extend("line", "location", 0, frames, 2 * frames, 1)
+    store.extend("hold", "location", 0, frames, np.r_[np.zeros(5), np.ones(5)], 0)
+    store.extend("curve", "location", 0, frames, frames ** 2, 1)
+    store.extend("line", "location", 0, 9., 18., 1)
+
+    removed = store.simplify(1e-6)
+    assert removed == {"line": 9, "hold": 8}
+    line = store.query(target="line")
+    assert line["frame"].tolist() == [0, 9]
+    hold = store.query(target="hold")
+    assert hold["frame"].tolist() == [0, 5]
+    assert len(store.query(target="curve")["frame"]) == 10
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from blender_script_creator.pointcache import PC2Writer, read_pc2, read_pc2_header
+from blender_script_creator.precompute import KeyframeRecorder, precompute_key, run_precompute
+
+
+def scene(recorder, dx=1):
+    recorder.set_initial("ball", "location", (0, 0, 0))
+    recorder.move_object("ball", dx, 2, 3, time=1)
+
+
+def test_recorder_keys_the_start_value():
+    baked = run_precompute(scene, fps=24)
+    assert baked["frame"] == [0, 0, 0, 24, 24, 24]
+    assert baked["value"] == [0, 0, 0, 1, 2, 3]
+    assert baked["frame_end"] == 24
+
+
+def test_recorder_needs_a_start_value():
+    recorder = KeyframeRecorder()
+    with pytest.raises(ValueError):
+        recorder.move_object("ball", 1, 2, 3, time=1)
+    with pytest.raises(ValueError):
+        recorder.move_object("ball", 1, 2, 3, delta=True)
+    recorder.move_object("ball", 1, 2, 3)
+    recorder.move_object("ball", 1, 0, 0, delta=True, time=1)
+    assert recorder.last_value("ball", "location").tolist() == [2, 2, 3]
+
+
+def test_precompute_key_hashes_array_contents():
+    positions = np.zeros((2000, 3))
+    changed = positions.copy()
+    changed[1000] = 5
+    assert precompute_key(scene, {"positions": positions}) == precompute_key(scene, {"positions": positions.copy()})
+    assert precompute_key(scene, {"positions": positions}) != precompute_key(scene, {"positions": changed})
+    assert precompute_key(scene, {"dx": 1}) != precompute_key(scene, {"dx": 1}, fps=25)
+
+
+def test_pc2_writer_appends(tmp_path):
+    path = str(tmp_path / "cache.pc2")
+    samples = np.random.default_rng(0).normal(size=(5, 4, 3)).astype(np.float32)
+    writer = PC2Writer(path, 4, start=10)
+    writer.append(samples[:2])
+    writer.append(samples[2])
+    PC2Writer(path, 4, append=True).append(samples[3:])
+
+    header, positions = read_pc2(path)
+    assert header["samples"] == 5 and header["start"] == 10 and header["points"] == 4
+    np.testing.assert_array_equal(positions, samples)
+    with pytest.raises(ValueError):
+        PC2Writer(path, 3, append=True)
+    assert read_pc2_header(path)["samples"] == 5
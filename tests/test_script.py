@@ -0,0 +1,110 @@
+import ast
+
+import numpy as np
+import pytest
+
+from blender_script_creator.animation import BlenderAnimationTracker
+from blender_script_creator.geometry import Mesh, Sphere
+from blender_script_creator.recording import run_script
+from blender_script_creator.script import BlenderClass, BlenderFunction, BlenderScript, BlenderVariable, \
+    DependencyCycleError, DependencyGraph, blender_function, iter_value_code
+from blender_script_creator.source import function_body, strip_decorators, tree_shake
+
+
+@blender_function(dependencies=[Sphere, Mesh, BlenderAnimationTracker])
+def scene_main():
+    anim = BlenderAnimationTracker()
+    ball = Sphere.new("ball", dia=2)
+    anim.move_object(ball, 1, 2, 3, time=1, interpolation="LINEAR")
+    anim.scale_object(ball, 2, 2, 2, time=0.5)
+    Mesh.from_numpy(np.zeros((4, 3)), np.array([[0, 1, 2, 3]]), name="quad")
+
+
+def scene_script(tree_shake):
+    script = BlenderScript(tree_shake=tree_shake)
+    script.main = scene_main
+    return script
+
+
+def test_tree_shaking_keeps_the_trace():
+    full = scene_script(False).to_script()
+    shaken_script = scene_script(True)
+    shaken = shaken_script.to_script()
+    assert len(shaken) < len(full)
+    assert shaken_script.shake_report.removed_functions or shaken_script.shake_report.removed_methods
+
+    full_trace = run_script(full)
+    shaken_trace = run_script(shaken)
+    assert full_trace.error is None and shaken_trace.error is None
+    assert full_trace.counts == shaken_trace.counts
+    assert full_trace.totals()["call"] > 0
+
+
+def test_tree_shaking_keeps_functions_used_by_variables():
+    @blender_function()
+    def helper():
+        return 1
+
+    def root():
+        pass
+
+    codes = [helper.to_code()]
+    assert tree_shake(codes, set())[0] == []
+    variable = BlenderVariable("VALUE", type("Call", (), {"__repr__": lambda self: "helper()"})())
+    assert tree_shake(codes, variable.referenced_names())[0] == codes
+
+
+def test_dependency_graph_order_and_cycles():
+    a = BlenderFunction(lambda: None)
+    b = BlenderFunction(lambda: None, dependencies=[a])
+    base = type("Base", (BlenderClass,), {"dependencies": [b]})
+    derived = type("Derived", (base,), {"dependencies": [a]})
+    graph = DependencyGraph()
+    graph.add(derived)
+    order = list(graph)
+    assert order.index(a) < order.index(b) < order.index(base) < order.index(derived)
+
+    c = BlenderFunction(lambda: None)
+    d = BlenderFunction(lambda: None, dependencies=[c])
+    c.dependencies.append(d)
+    with pytest.raises(DependencyCycleError):
+        DependencyGraph().add(d)
+
+
+def one_line(x): return x + 1
+
+
+def multi_line(x):
+    text = """
+  kept as is"""
+    if x:
+        return text
+    return None
+
+
+def test_function_body():
+    assert function_body(one_line) == "return x + 1"
+    body = function_body(multi_line)
+    assert body.startswith('text = """\n  kept as is"""\nif x:\n    return text')
+    ast.parse(body)
+
+
+def test_strip_decorators():
+    source = "@blender_function(dependencies=[\n])\ndef f(a):\n    return a\n"
+    assert strip_decorators(source) == "def f(a):\n    return a\n"
+    nested = "    @x\n    @y(1,\n       2)\n    def g():\n        pass\n"
+    assert strip_decorators(nested) == "    def g():\n        pass\n"
+
+
+def test_iter_value_code_round_trip():
+    value = {"list": [1, 2.5, "x", None, (1,), ()], "array": np.arange(6.).reshape(2, 3),
+             "empty": np.zeros(0), "structured": np.array([(1, 2.)], dtype=[("t", "<i4"), ("v", "<f8")]),
+             "long": list(range(5000))}
+    namespace = {"np": np}
+    restored = eval("".join(iter_value_code(value)), namespace)
+    assert restored["list"] == value["list"]
+    assert restored["long"] == value["long"]
+    for name in ("array", "empty", "structured"):
+        assert restored[name].dtype == value[name].dtype
+        np.testing.assert_array_equal(restored[name], value[name])
+    assert len(list(iter_value_code(value["long"], chunk=1000))) <= 7
@@ -0,0 +1,56 @@
+import numpy as np
+
+from blender_script_creator.simulation import BallSimulation
+from blender_script_creator.trajectories import BoxBounce
+
+
+def test_box_bounce_events_and_positions():
+    bounce = BoxBounce([[0.5, 0.2, 0.9]], [[1.3, -0.7, 0.1]], box_min=0, box_max=1, radius=0.1, duration=3)
+    events = bounce.events
+    assert np.all(np.diff(events["time"]) >= 0)
+    positions = bounce.positions_at(events["time"], events["body"])
+    wall = np.where(events["wall"] == 1, 0.9, 0.1)
+    np.testing.assert_allclose(positions[np.arange(len(events)), events["axis"]], wall, atol=1e-12)
+
+    times = np.linspace(0, 3, 301)
+    positions = bounce.positions_at(times)
+    assert np.all((positions >= 0.1 - 1e-12) & (positions <= 0.9 + 1e-12))
+    # a straight line between consecutive keys reproduces the motion
+    bodies, key_times = bounce.keyframe_times()
+    for axis in range(3):
+        keyed = np.interp(times, key_times, bounce.positions_at(key_times, bodies)[:, axis])
+        np.testing.assert_allclose(keyed, positions[:, axis], atol=1e-9)
+
+
+def random_simulation(n, seed=1):
+    rng = np.random.default_rng(seed)
+    return BallSimulation(rng.uniform(0.5, 9.5, (n, 3)), rng.normal(size=(n, 3)) * 3, radii=0.5, box_min=0,
+                          box_max=10)
+
+
+def test_broadphase_finds_every_touching_pair():
+    sim = random_simulation(400)
+    i, j = sim.candidate_pairs()
+    candidates = set(zip(np.minimum(i, j), np.maximum(i, j)))
+    d = sim.positions[:, None] - sim.positions[None]
+    touching = np.einsum("ijk,ijk->ij", d, d) < 1
+    assert set(zip(*np.nonzero(np.triu(touching, 1)))) <= candidates
+    assert len(candidates) == len(i)
+
+
+def test_collisions_conserve_energy_and_keys_stay_in_the_box():
+    sim = random_simulation(200)
+    energy = np.sum(sim.masses[:, None] * sim.velocities ** 2)
+    events = sim.run(2)
+    assert len(events) and np.any(events["other"] >= 0)
+    np.testing.assert_allclose(np.sum(sim.masses[:, None] * sim.velocities ** 2), energy, rtol=1e-9)
+    bodies, times, positions = sim.keyframes()
+    assert np.all((positions >= 0.5 - 1e-9) & (positions <= 9.5 + 1e-9))
+
+
+def test_several_wall_hits_in_one_step():
+    sim = BallSimulation([[9.4, 9.45, 5]], [[10, 10, 0]], radii=0.5, box_min=0, box_max=10, fps=50, substeps=1)
+    sim.step()
+    bodies, times, positions = sim.keyframes()
+    np.testing.assert_allclose(times, [0, 0.005, 0.01])
+    np.testing.assert_allclose(positions, [[9.4, 9.45, 5], [9.45, 9.5, 5], [9.5, 9.45, 5]])